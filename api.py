@@ -118,7 +118,7 @@ def _load_credentials():
 @lru_cache(maxsize=1)
 def _build_service():
     creds = _load_credentials()
-    return build("sheets", "v4", credentials=creds)
+    return build("sheets", "v4", credentials=creds, cache_discovery=False)
 
 
 def _get_sheet_service():
@@ -240,8 +240,12 @@ def _format_date_for_sheet(d: date_type) -> str:
     return d.strftime("%d/%m/%Y")
 
 
+@lru_cache(maxsize=4096)
 def _normalize_date_value(value: str) -> str:
-    """Normalise date strings so sheet rows and API filters compare reliably."""
+    """Normalise date strings so sheet rows and API filters compare reliably.
+
+    Sheets repeat a small set of dates across many rows, so results are memoised.
+    """
     raw = str(value or "").strip()
     if not raw:
         return ""
@@ -62,7 +62,11 @@ TEMPLATE_PATH = _get("TEMPLATE_PATH", "Site_Daily_report_Template_Date.docx")
 SHEET_ID = _get("SHEET_ID", "1t6Bmm3YN7mAovNM3iT7oMGeXG3giDONSejJ9gUbUeCI")
 SHEET_NAME = _get("SHEET_NAME", "Reports")
 CACHE_FILE = Path(_get("CACHE_FILE", BASE_DIR / "offline_cache.json"))
+SNAPSHOT_FILE = Path(_get("SNAPSHOT_FILE", BASE_DIR / "sheet_snapshot.json"))
 DISCIPLINE_COL = int(_get("DISCIPLINE_COL", 11))
+# Upper bound on report-render worker processes; each one imports the full
+# app stack, so small containers should keep this low.
+PROCESS_POOL_MAX_WORKERS = int(_get("PROCESS_POOL_MAX_WORKERS", 2))
 
 __all__ = [
     "BASE_DIR",
@@ -70,5 +74,7 @@ __all__ = [
     "SHEET_ID",
     "SHEET_NAME",
     "CACHE_FILE",
+    "SNAPSHOT_FILE",
     "DISCIPLINE_COL",
+    "PROCESS_POOL_MAX_WORKERS",
 ]
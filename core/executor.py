@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import streamlit as st
+
+from config import PROCESS_POOL_MAX_WORKERS
+
+# One bound for every fan-out (report rendering, caption requests) so reruns
+# and concurrent sessions cannot stack up unbounded API or CPU work.
+SHARED_EXECUTOR_MAX_WORKERS = 8
+
+
+def _available_cpu_count() -> int:
+    """Return the CPUs this process may run on rather than the host total."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - macOS/Windows
+        return os.cpu_count() or 1
+
+
+PROCESS_EXECUTOR_MAX_WORKERS = max(1, min(PROCESS_POOL_MAX_WORKERS, _available_cpu_count()))
+
+
+@st.cache_resource(show_spinner=False)
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide worker pool reused across Streamlit reruns.
+
+    The pool is intentionally never shut down; callers submit work and wait
+    on their own futures instead of using it as a context manager.
+    """
+    return ThreadPoolExecutor(
+        max_workers=SHARED_EXECUTOR_MAX_WORKERS,
+        thread_name_prefix="ibc-worker",
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_process_executor() -> ProcessPoolExecutor:
+    """Return a reusable process pool for CPU-bound work that holds the GIL.
+
+    Workers are spawned rather than forked because the Streamlit server is
+    already multi-threaded; the import cost is paid once per worker.
+    """
+    return ProcessPoolExecutor(
+        max_workers=PROCESS_EXECUTOR_MAX_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
@@ -1,18 +1,33 @@
+import hashlib
 import os
-import tempfile
+import re
 import zipfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import lru_cache, partial
+from itertools import chain
 from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Optional
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import streamlit as st
 from docxtpl import DocxTemplate, InlineImage
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from docx.shared import Mm
+from jinja2 import Environment, Template
 from PIL import Image, ImageDraw, ImageFont, ImageOps
 
 from config import TEMPLATE_PATH
+from core.executor import (
+    PROCESS_EXECUTOR_MAX_WORKERS,
+    SHARED_EXECUTOR_MAX_WORKERS,
+    get_executor,
+    get_process_executor,
+)
+from report_structuring import REPORT_HEADERS
 
 BASE_DIR = Path(__file__).parent.resolve()
 EMU_PER_MM = Mm(1).emu
@@ -23,6 +38,27 @@ TOP_SLOT_ASPECT_RATIO = 900 / 1150
 BOTTOM_SLOT_ASPECT_RATIO = 1600 / 1060
 LANDSCAPE_ASPECT_THRESHOLD = 1.05
 PORTRAIT_ASPECT_THRESHOLD = 0.95
+# Large exports are split into a few batches per worker so task overhead stays
+# amortised; small exports still get one row per task for full parallelism.
+REPORT_RENDER_BATCHES_PER_WORKER = 4
+# docxtpl rendering holds the GIL, so large exports go to worker processes;
+# below this size the one-off pickling and spawn cost outweighs the gain.
+REPORT_PROCESS_POOL_MIN_ROWS = 24
+# Day-first formats written by the app and the mobile API; anything else
+# falls back to pandas' lenient parser.
+DAY_FIRST_DATE_FORMATS = ("%d/%m/%Y", "%d.%m.%Y", "%d-%m-%Y")
+_DATE_ISO_SEPARATORS = str.maketrans({"/": "-", "\\": "-"})
+_DATE_TITLE_SEPARATORS = str.maketrans({"/": ".", "-": "."})
+# DOCX files are already deflate-compressed ZIP containers, so a second
+# deflate pass in the export archive burns CPU for almost no size gain.
+EXPORT_ZIP_COMPRESSION = zipfile.ZIP_STORED
+_ILLEGAL_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|]+')
+_FILENAME_WHITESPACE = re.compile(r"\s+")
+# ASCII characters either pattern above would rewrite; a single space is the
+# only whitespace ``\s+`` leaves unchanged.
+_FILENAME_FAST_PATH_UNSAFE = frozenset('\\/:*?"<>|') | frozenset(
+    c for c in map(chr, range(128)) if c.isspace() and c != " "
+)
 
 SIGNATORIES = {
     "Civil": {
@@ -69,36 +105,62 @@ def signatories_for_row(
 
 def safe_filename(s: str, max_len: int = 150) -> str:
     """Remove illegal filename characters and tidy whitespace."""
-    import re
-
     s = str(s)
-    s = re.sub(r'[\\/:*?"<>|]+', "-", s)
-    s = re.sub(r"\s+", " ", s).strip(" .-")
-    return s[:max_len]
+    if s.isascii() and _FILENAME_FAST_PATH_UNSAFE.isdisjoint(s) and "  " not in s:
+        # Already clean (the usual site name): skip both regex passes.
+        return s.strip(" .-")[:max_len]
+    s = _ILLEGAL_FILENAME_CHARS.sub("-", s)
+    return _FILENAME_WHITESPACE.sub(" ", s).strip(" .-")[:max_len]
 
 
+def _parse_day_first_date(d) -> Optional[datetime]:
+    """Parse the sheet's day-first date formats without importing pandas."""
+    value = str(d).strip()
+    for fmt in DAY_FIRST_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4096)
 def normalize_date(d) -> str:
     """Normalize date like '06/08/2025' -> '2025-08-06'."""
+    parsed = _parse_day_first_date(d)
+    if parsed is not None:
+        return parsed.strftime("%Y-%m-%d")
+
     import pandas as pd
 
     try:
         return pd.to_datetime(d, dayfirst=True, errors="raise").strftime("%Y-%m-%d")
     except Exception:
-        return str(d).replace("/", "-").replace("\\", "-")
+        return str(d).translate(_DATE_ISO_SEPARATORS)
 
 
+@lru_cache(maxsize=4096)
 def format_date_title(d: str) -> str:
     """Return dd.MM.YYYY for filenames like 04.08.2025."""
+    parsed = _parse_day_first_date(d)
+    if parsed is not None:
+        return parsed.strftime("%d.%m.%Y")
+
     import pandas as pd
 
     try:
         return pd.to_datetime(d, dayfirst=True, errors="raise").strftime("%d.%m.%Y")
     except Exception:
-        return str(d).replace("/", ".").replace("-", ".")
+        return str(d).translate(_DATE_TITLE_SEPARATORS)
 
 
+@lru_cache(maxsize=64)
 def resolve_asset(name: Optional[str]) -> Optional[str]:
-    """Find an asset whether it's in ./ or ./signatures/, with or without extension."""
+    """Find an asset whether it's in ./ or ./signatures/, with or without extension.
+
+    Bundled assets do not move while the app runs, so lookups are memoised
+    instead of probing up to ten candidate paths for every rendered row.
+    """
     if not name:
         return None
     p = (BASE_DIR / name).resolve()
@@ -116,26 +178,147 @@ def resolve_asset(name: Optional[str]) -> Optional[str]:
     return None
 
 
-def _create_sanitized_template_copy(template_path: str) -> str:
-    """Return a temporary copy of the template with problematic placeholders normalised."""
+@lru_cache(maxsize=32)
+def _asset_bytes_for(asset_path: str, mtime_ns: int) -> bytes:
+    _ = mtime_ns
+    return Path(asset_path).read_bytes()
 
-    with zipfile.ZipFile(template_path, "r") as src, tempfile.NamedTemporaryFile(
-        delete=False, suffix=".docx"
-    ) as tmp:
-        with zipfile.ZipFile(tmp, "w") as dst:
-            for item in src.infolist():
-                data = src.read(item.filename)
-                if item.filename.endswith(".xml") and PLACEHOLDER_REPLACEMENTS:
-                    try:
-                        text = data.decode("utf-8")
-                    except UnicodeDecodeError:
-                        pass
-                    else:
-                        for old, new in PLACEHOLDER_REPLACEMENTS.items():
-                            text = text.replace(old, new)
-                        data = text.encode("utf-8")
-                dst.writestr(item, data)
-    return tmp.name
+
+def _asset_image_stream(asset_path: str) -> BytesIO:
+    """Return an in-memory stream of an asset image, read from disk once."""
+
+    return BytesIO(_asset_bytes_for(asset_path, os.stat(asset_path).st_mtime_ns))
+
+
+@lru_cache(maxsize=4)
+def _sanitized_template_bytes_for(template_path: str, mtime_ns: int) -> bytes:
+    """Return template bytes with problematic placeholders normalised."""
+
+    _ = mtime_ns
+    buffer = BytesIO()
+    with zipfile.ZipFile(template_path, "r") as src, zipfile.ZipFile(buffer, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.endswith(".xml") and PLACEHOLDER_REPLACEMENTS:
+                try:
+                    text = data.decode("utf-8")
+                except UnicodeDecodeError:
+                    pass
+                else:
+                    for old, new in PLACEHOLDER_REPLACEMENTS.items():
+                        text = text.replace(old, new)
+                    data = text.encode("utf-8")
+            dst.writestr(item, data)
+    return buffer.getvalue()
+
+
+def _sanitized_template_bytes(template_path: str) -> bytes:
+    """Return sanitised template bytes, re-reading only when the file changes."""
+
+    return _sanitized_template_bytes_for(str(template_path), os.stat(template_path).st_mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _patched_template_xml(src_xml: str) -> str:
+    """Return docxtpl's jinja clean-up of ``src_xml``.
+
+    ``patch_xml`` is a pure string transform that never touches ``self``,
+    and the body/header/footer XML is identical for every row rendered from
+    the same template, so the regex passes only run once per part.
+    """
+    return DocxTemplate.patch_xml(None, src_xml)
+
+
+class _PatchCachingDocxTemplate(DocxTemplate):
+    """DocxTemplate that reuses the patched XML of unchanged template parts."""
+
+    def patch_xml(self, src_xml):
+        return _patched_template_xml(src_xml)
+
+
+class _CompiledPartEnvironment(Environment):
+    """Jinja environment that compiles each distinct template part only once.
+
+    docxtpl compiles the body, header, footer and property XML on every
+    render, yet those sources are identical for every row rendered from the
+    same template. Compiled templates are safe to render concurrently.
+    """
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is None and template_class is None and isinstance(source, str):
+            return _compiled_template_part(source)
+        return super().from_string(source, globals, template_class)
+
+
+_REPORT_JINJA_ENV = _CompiledPartEnvironment()
+
+
+@lru_cache(maxsize=32)
+def _compiled_template_part(src_xml: str) -> Template:
+    return Environment.from_string(_REPORT_JINJA_ENV, src_xml)
+
+
+_XML_TAG = re.compile(r"<[^>]+>")
+_TEMPLATE_TAG = re.compile(r"\{[{%#].*?[}%#]\}", re.S)
+_BARE_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+def _bare_template_placeholders(template_bytes: bytes) -> frozenset[str] | None:
+    """Return the template's placeholder names, or None if any tag is more than ``{{ name }}``."""
+
+    names = set()
+    with zipfile.ZipFile(BytesIO(template_bytes)) as archive:
+        for item_name in archive.namelist():
+            if not item_name.endswith(".xml"):
+                continue
+            text = _XML_TAG.sub("", archive.read(item_name).decode("utf-8", "ignore"))
+            for tag in _TEMPLATE_TAG.findall(text):
+                match = _BARE_PLACEHOLDER.fullmatch(tag)
+                if match is None:
+                    return None
+                names.add(match.group(1))
+    return frozenset(names)
+
+
+def _signature_image(tpl: DocxTemplate, asset_name: str | None) -> InlineImage | str:
+    asset_path = resolve_asset(asset_name)
+    return InlineImage(tpl, _asset_image_stream(asset_path), width=Mm(30)) if asset_path else ""
+
+
+def _signatory_context(tpl: DocxTemplate, sign_info: dict[str, str]) -> Dict[str, object]:
+    return {
+        "Consultant_Name": sign_info.get("Consultant_Name", ""),
+        "Consultant_Title": sign_info.get("Consultant_Title", ""),
+        "Contractor_Name": sign_info.get("Contractor_Name", ""),
+        "Contractor_Title": sign_info.get("Contractor_Title", ""),
+        "Consultant_Signature": _signature_image(tpl, sign_info.get("Consultant_Signature")),
+        "Contractor_Signature": _signature_image(tpl, sign_info.get("Contractor_Signature")),
+    }
+
+
+@lru_cache(maxsize=8)
+def _signatory_template_bytes(
+    template_bytes: bytes, signatories: tuple[tuple[str, str], ...]
+) -> bytes | None:
+    """Return the template with one signatory set rendered in, or None.
+
+    Signatory names and signature images are the same for every row of a
+    discipline, so they are rendered (and the images embedded) once and rows
+    only fill their own fields. Every other placeholder renders back as itself.
+    Templates using Jinja statements or expressions keep the one-pass render,
+    since an early pass would evaluate them.
+    """
+    placeholders = _bare_template_placeholders(template_bytes)
+    if placeholders is None:
+        return None
+
+    tpl = _PatchCachingDocxTemplate(BytesIO(template_bytes))
+    ctx: Dict[str, object] = {name: "{{ " + name + " }}" for name in placeholders}
+    ctx.update(_signatory_context(tpl, dict(signatories)))
+    tpl.render(ctx, jinja_env=_REPORT_JINJA_ENV)
+    buffer = BytesIO()
+    tpl.save(buffer)
+    return buffer.getvalue()
 
 
 def _mm_to_twips(mm_value: float) -> int:
@@ -273,6 +456,10 @@ def _prepared_gallery_image_bytes(
 
     try:
         with Image.open(BytesIO(image_bytes)) as img:
+            # Phone JPEGs are many times the slot size; let libjpeg decode at a
+            # reduced scale that still covers the slot in either orientation.
+            longest_side = max(size)
+            img.draft("RGB", (longest_side, longest_side))
             image = ImageOps.exif_transpose(img).convert("RGB")
             fitted = ImageOps.fit(
                 image,
@@ -674,6 +861,238 @@ def _apply_cell_spacing(cell, spacing_mm: float, column_index: int, total_column
     return left, right
 
 
+def _gallery_page_cache_key(
+    page_images: List[bytes],
+    captions: List[str],
+    *options: object,
+) -> bytes:
+    """Return a content hash identifying one composed gallery page."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    for image_bytes in page_images:
+        digest.update(hashlib.blake2b(image_bytes, digest_size=16).digest())
+    digest.update(repr((list(captions), options)).encode("utf-8"))
+    return digest.digest()
+
+
+class _GalleryPageCache:
+    """Share composed gallery pages between render workers by content hash.
+
+    The first worker to ask for a key composes the page; concurrent callers
+    wait on the same future instead of composing it again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._pages: Dict[bytes, Future] = {}
+
+    def get_or_compose(self, key: bytes, compose: Callable[[], bytes | None]) -> bytes | None:
+        with self._lock:
+            page = self._pages.get(key)
+            is_owner = page is None
+            if is_owner:
+                page = self._pages[key] = Future()
+        if is_owner:
+            try:
+                page.set_result(compose())
+            except Exception as exc:
+                page.set_exception(exc)
+        return page.result()
+
+
+def _render_report_docx(
+    row: List[str],
+    *,
+    template_bytes: bytes,
+    uploaded_image_mapping: Dict[tuple, List[bytes]],
+    image_caption_mapping: Optional[Dict[tuple, List[str]]],
+    discipline: str,
+    gallery_width_mm: float,
+    wide_photo_height_mm: float | None,
+    spacing_mm: int,
+    add_border: bool,
+    show_photo_placeholders: bool,
+    gallery_page_cache: _GalleryPageCache,
+) -> tuple[str, str, BytesIO]:
+    """Render one sheet row and return ``(site_name, date, docx_buffer)``."""
+
+    # Sheet columns map one-to-one onto the template placeholders.
+    ctx: Dict[str, object] = dict(zip(REPORT_HEADERS, (row + [""] * 14)[:14]))
+    site_name = ctx["Site_Name"] = str(ctx["Site_Name"]).strip()
+    date = ctx["Date"] = str(ctx["Date"]).strip()
+
+    sign_info = signatories_for_row(
+        discipline,
+        site_name,
+        ctx["Work"],
+        ctx["Work_Executed"],
+        ctx["Another_Work_Executed"],
+        ctx["Comment_on_work"],
+    )
+    signatory_template = _signatory_template_bytes(template_bytes, tuple(sorted(sign_info.items())))
+
+    # Each worker needs its own instance because render() mutates it, but
+    # wrapping the shared bytes skips the disk read and placeholder rewrite.
+    tpl = _PatchCachingDocxTemplate(BytesIO(signatory_template or template_bytes))
+
+    image_bytes = uploaded_image_mapping.get((site_name, date), []) or []
+    image_captions = (image_caption_mapping or {}).get((site_name, date), []) or []
+    gallery_groups = _gallery_page_groups(image_bytes)
+    if not gallery_groups and show_photo_placeholders:
+        gallery_groups = [[]]
+
+    images_subdoc = tpl.new_subdoc()
+    for index, gallery_group in enumerate(gallery_groups):
+        caption_group = image_captions[index * 3 : (index + 1) * 3]
+        page_key = _gallery_page_cache_key(
+            gallery_group,
+            caption_group,
+            gallery_width_mm,
+            wide_photo_height_mm,
+            spacing_mm,
+            add_border,
+            show_photo_placeholders,
+        )
+        gallery_page_bytes = gallery_page_cache.get_or_compose(
+            page_key,
+            partial(
+                _compose_gallery_page_bytes,
+                gallery_group,
+                captions=caption_group,
+                gallery_width_mm=gallery_width_mm,
+                wide_photo_height_mm=wide_photo_height_mm,
+                spacing_mm=spacing_mm,
+                add_border=add_border,
+                show_photo_placeholders=show_photo_placeholders,
+            ),
+        )
+        if not gallery_page_bytes:
+            continue
+
+        paragraph = images_subdoc.add_paragraph()
+        paragraph.alignment = 1
+        paragraph.add_run().add_picture(BytesIO(gallery_page_bytes), width=Mm(gallery_width_mm))
+
+        if index != len(gallery_groups) - 1:
+            images_subdoc.add_page_break()
+
+    if signatory_template is None:
+        ctx.update(_signatory_context(tpl, sign_info))
+    ctx.update(
+        {
+            "Images": images_subdoc,
+            # Backwards compatibility for templates that still use the unsanitised placeholder.
+            "Reaction&WayForword": ctx["Reaction_and_WayForword"],
+        }
+    )
+
+    tpl.render(ctx, jinja_env=_REPORT_JINJA_ENV)
+
+    docx_buffer = BytesIO()
+    tpl.save(docx_buffer)
+    return site_name, date, docx_buffer
+
+
+def _render_report_batch(
+    render_row: Callable[[List[str]], tuple[str, str, BytesIO]],
+    rows: List[List[str]],
+) -> List[tuple[str, str, BytesIO]]:
+    """Render a contiguous batch of rows inside one worker task."""
+
+    return [render_row(row) for row in rows]
+
+
+def _row_batches(rows: List[List[str]], worker_count: int) -> List[List[List[str]]]:
+    """Split rows into contiguous batches, a few per worker for load balance."""
+
+    batch_size = max(1, len(rows) // (worker_count * REPORT_RENDER_BATCHES_PER_WORKER))
+    return [rows[index : index + batch_size] for index in range(0, len(rows), batch_size)]
+
+
+def _row_image_key(row: List[str]) -> tuple[str, str]:
+    date, site_name = (list(row[:2]) + ["", ""])[:2]
+    return str(site_name).strip(), str(date).strip()
+
+
+def _mapping_for_rows(mapping: Optional[Dict[tuple, list]], rows: List[List[str]]) -> Dict[tuple, list]:
+    """Return only the mapping entries a batch needs, to keep pickling small."""
+
+    if not mapping:
+        return {}
+    keys = {_row_image_key(row) for row in rows}
+    return {key: mapping[key] for key in keys if key in mapping}
+
+
+def _render_report_batch_in_process(
+    rows: List[List[str]],
+    render_options: Dict[str, object],
+    uploaded_image_mapping: Dict[tuple, List[bytes]],
+    image_caption_mapping: Dict[tuple, List[str]],
+) -> List[tuple[str, str, BytesIO]]:
+    """Process-pool entry point: rebuild the row renderer from picklable parts."""
+
+    render_row = partial(
+        _render_report_docx,
+        uploaded_image_mapping=uploaded_image_mapping,
+        image_caption_mapping=image_caption_mapping,
+        gallery_page_cache=_GalleryPageCache(),
+        **render_options,
+    )
+    return _render_report_batch(render_row, rows)
+
+
+def _warn_missing_signatory_placeholders(template_bytes: bytes) -> None:
+    """Warn once per export when the template lacks the signatory placeholders."""
+
+    required = {
+        "Consultant_Name",
+        "Consultant_Title",
+        "Consultant_Signature",
+        "Contractor_Name",
+        "Contractor_Title",
+        "Contractor_Signature",
+    }
+    placeholders = DocxTemplate(BytesIO(template_bytes)).get_undeclared_template_variables({})
+    missing = required - placeholders
+    if missing:
+        st.warning(
+            "Template is missing placeholders: " + ", ".join(sorted(missing))
+        )
+
+
+def _write_report_zip(rendered: Iterable[Tuple[str, str, BytesIO]]) -> bytes:
+    """Write rendered ``(site, date, docx_buffer)`` results into a ZIP archive.
+
+    Results are consumed as they arrive, so each document buffer is released
+    once its entry is written instead of every report being held in memory
+    alongside the finished archive.
+    """
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(
+        zip_buffer, "w", compression=EXPORT_ZIP_COMPRESSION, allowZip64=True
+    ) as zipf:
+        used_names: Dict[str, int] = {}
+        for site_name, date, docx_buffer in rendered:
+            base_filename = safe_filename(
+                "_".join(filter(None, [site_name or "report", format_date_title(date)]))
+            )
+            if not base_filename:
+                base_filename = "report"
+            count = used_names.get(base_filename, 0) + 1
+            used_names[base_filename] = count
+            filename = base_filename if count == 1 else f"{base_filename}_{count}"
+            if not filename.lower().endswith(".docx"):
+                filename = f"{filename}.docx"
+
+            # Copy straight from the rendered buffer into the archive entry
+            # rather than materialising an intermediate bytes object.
+            with zipf.open(filename, "w") as entry:
+                entry.write(docx_buffer.getbuffer())
+
+    # BytesIO hands back its own buffer here, so no second archive copy is made.
+    return zip_buffer.getvalue()
+
+
 def generate_reports(
     filtered_rows: List[List[str]],
     uploaded_image_mapping: Dict[tuple, List[bytes]],
@@ -687,160 +1106,60 @@ def generate_reports(
     image_caption_mapping: Optional[Dict[tuple, List[str]]] = None,
     template_path: str = TEMPLATE_PATH,
 ) -> bytes:
-    """Create a ZIP archive of rendered DOCX reports."""
-    zip_buffer = BytesIO()
-    sanitized_template = _create_sanitized_template_copy(template_path)
-    gallery_width_mm = max(1.0, float(img_width_mm))
-    wide_photo_height_mm = float(img_height_mm) if img_height_mm else None
-
-    try:
-        with zipfile.ZipFile(zip_buffer, "w") as zipf:
-            used_names: Dict[str, int] = {}
-            for row in filtered_rows:
-                (
-                    date,
-                    site_name,
-                    district,
-                    work,
-                    human_resources,
-                    supply,
-                    work_executed,
-                    comment_on_work,
-                    another_work_executed,
-                    comment_on_hse,
-                    consultant_recommandation,
-                    non_compliant_work,
-                    reaction_way_forward,
-                    challenges,
-                ) = (row + [""] * 14)[:14]
-                site_name = site_name.strip()
-                date = date.strip()
+    """Create a ZIP archive of rendered DOCX reports.
+
+    Rows are rendered concurrently; each worker owns its own template
+    instance, while ZIP writing and filename de-duplication stay on the
+    calling thread so archive order matches ``filtered_rows``. Exports of
+    at least ``REPORT_PROCESS_POOL_MIN_ROWS`` rows render in worker
+    processes, smaller ones on the shared thread pool.
+    """
+    template_bytes = _sanitized_template_bytes(template_path)
+    render_options: Dict[str, object] = {
+        "template_bytes": template_bytes,
+        "discipline": discipline,
+        "gallery_width_mm": max(1.0, float(img_width_mm)),
+        "wide_photo_height_mm": float(img_height_mm) if img_height_mm else None,
+        "spacing_mm": spacing_mm,
+        "add_border": add_border,
+        "show_photo_placeholders": show_photo_placeholders,
+    }
 
-                tpl = DocxTemplate(sanitized_template)
+    if filtered_rows:
+        _warn_missing_signatory_placeholders(template_bytes)
 
-                required = {
-                    "Consultant_Name",
-                    "Consultant_Title",
-                    "Consultant_Signature",
-                    "Contractor_Name",
-                    "Contractor_Title",
-                    "Contractor_Signature",
-                }
-                placeholders = tpl.get_undeclared_template_variables({})
-                missing = required - placeholders
-                if missing:
-                    st.warning(
-                        "Template is missing placeholders: " + ", ".join(sorted(missing))
+    if len(filtered_rows) >= REPORT_PROCESS_POOL_MIN_ROWS:
+        row_batches = _row_batches(filtered_rows, PROCESS_EXECUTOR_MAX_WORKERS)
+        try:
+            return _write_report_zip(
+                chain.from_iterable(
+                    get_process_executor().map(
+                        _render_report_batch_in_process,
+                        row_batches,
+                        [render_options] * len(row_batches),
+                        [_mapping_for_rows(uploaded_image_mapping, batch) for batch in row_batches],
+                        [_mapping_for_rows(image_caption_mapping, batch) for batch in row_batches],
                     )
+                )
+            )
+        except BrokenProcessPool:
+            # The partial archive is discarded; re-render on threads below.
+            get_process_executor.clear()
 
-                image_bytes = uploaded_image_mapping.get((site_name, date), []) or []
-                image_captions = (image_caption_mapping or {}).get((site_name, date), []) or []
-                gallery_groups = _gallery_page_groups(image_bytes)
-                if not gallery_groups and show_photo_placeholders:
-                    gallery_groups = [[]]
-
-                images_subdoc = tpl.new_subdoc()
-                for index, gallery_group in enumerate(gallery_groups):
-                    caption_group = image_captions[index * 3 : (index + 1) * 3]
-                    gallery_page_bytes = _compose_gallery_page_bytes(
-                        gallery_group,
-                        captions=caption_group,
-                        gallery_width_mm=gallery_width_mm,
-                        wide_photo_height_mm=wide_photo_height_mm,
-                        spacing_mm=spacing_mm,
-                        add_border=add_border,
-                        show_photo_placeholders=show_photo_placeholders,
-                    )
-                    if not gallery_page_bytes:
-                        continue
-
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_img:
-                        tmp_img.write(gallery_page_bytes)
-                        tmp_img.flush()
-                        gallery_path = tmp_img.name
-
-                    paragraph = images_subdoc.add_paragraph()
-                    paragraph.alignment = 1
-                    paragraph.add_run().add_picture(gallery_path, width=Mm(gallery_width_mm))
-                    try:
-                        os.remove(gallery_path)
-                    except OSError:
-                        pass
-
-                    if index != len(gallery_groups) - 1:
-                        images_subdoc.add_page_break()
-
-                sign_info = signatories_for_row(
-                    discipline,
-                    site_name,
-                    work,
-                    work_executed,
-                    another_work_executed,
-                    comment_on_work,
-                )
-                cons_sig_path = resolve_asset(sign_info.get("Consultant_Signature"))
-                cont_sig_path = resolve_asset(sign_info.get("Contractor_Signature"))
-                cons_sig_img = (
-                    InlineImage(tpl, cons_sig_path, width=Mm(30)) if cons_sig_path else ""
-                )
-                cont_sig_img = (
-                    InlineImage(tpl, cont_sig_path, width=Mm(30)) if cont_sig_path else ""
-                )
-
-                ctx = {
-                    "Date": date,
-                    "Site_Name": site_name,
-                    "District": district,
-                    "Work": work,
-                    "Human_Resources": human_resources,
-                    "Supply": supply,
-                    "Work_Executed": work_executed,
-                    "Comment_on_work": comment_on_work,
-                    "Another_Work_Executed": another_work_executed,
-                    "Comment_on_HSE": comment_on_hse,
-                    "Consultant_Recommandation": consultant_recommandation,
-                    "Non_Compliant_work": non_compliant_work,
-                    "Reaction_and_WayForword": reaction_way_forward,
-                    "challenges": challenges,
-                    "Consultant_Name": sign_info.get("Consultant_Name", ""),
-                    "Consultant_Title": sign_info.get("Consultant_Title", ""),
-                    "Contractor_Name": sign_info.get("Contractor_Name", ""),
-                    "Contractor_Title": sign_info.get("Contractor_Title", ""),
-                    "Consultant_Signature": cons_sig_img,
-                    "Contractor_Signature": cont_sig_img,
-                    "Images": images_subdoc,
-                }
-
-                # Backwards compatibility for templates that still use the unsanitised placeholder.
-                ctx["Reaction&WayForword"] = reaction_way_forward
-
-                tpl.render(ctx)
-
-                base_filename = safe_filename(
-                    "_".join(filter(None, [site_name or "report", format_date_title(date)]))
-                )
-                if not base_filename:
-                    base_filename = "report"
-                count = used_names.get(base_filename, 0) + 1
-                used_names[base_filename] = count
-                filename = base_filename if count == 1 else f"{base_filename}_{count}"
-                if not filename.lower().endswith(".docx"):
-                    filename = f"{filename}.docx"
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_doc:
-                    tpl.save(tmp_doc.name)
-                    tmp_path = tmp_doc.name
-                with open(tmp_path, "rb") as fh:
-                    zipf.writestr(filename, fh.read())
-                try:
-                    os.remove(tmp_path)
-                except OSError:
-                    pass
-
-    finally:
-        try:
-            os.remove(sanitized_template)
-        except OSError:
-            pass
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
+    render_row = partial(
+        _render_report_docx,
+        uploaded_image_mapping=uploaded_image_mapping,
+        image_caption_mapping=image_caption_mapping,
+        # Rows sharing a site/date reuse the same photos, so composed pages
+        # are shared by content hash instead of being re-decoded and resized.
+        gallery_page_cache=_GalleryPageCache(),
+        **render_options,
+    )
+    return _write_report_zip(
+        chain.from_iterable(
+            get_executor().map(
+                partial(_render_report_batch, render_row),
+                _row_batches(filtered_rows, SHARED_EXECUTOR_MAX_WORKERS),
+            )
+        )
+    )
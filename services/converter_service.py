@@ -40,6 +40,10 @@ from services.research_service import converter_response_options, extract_respon
 from services.usage_logging import log_usage_event
 
 EMPTY_PLACEHOLDERS = {"n/a", "na", "none", "null", "-", "--", "nil"}
+_INLINE_WHITESPACE = re.compile(r"[ \t]+")
+_EXCESS_BLANK_LINES = re.compile(r"\n{3,}")
+_REPEATED_PUNCTUATION = re.compile(r"([!?.,:;])\1{1,}")
+_NON_ALPHANUMERIC = re.compile(r"[^A-Za-z0-9]+")
 
 
 def structured_report_rows(value: object) -> list[dict[str, str]]:
@@ -170,9 +174,9 @@ def normalize_field_value(value: object) -> str:
     text = str(value or "").strip()
     if not text:
         return ""
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    text = re.sub(r"([!?.,:;])\1{1,}", r"\1", text)
+    text = _INLINE_WHITESPACE.sub(" ", text)
+    text = _EXCESS_BLANK_LINES.sub("\n\n", text)
+    text = _REPEATED_PUNCTUATION.sub(r"\1", text)
     if text.lower() in EMPTY_PLACEHOLDERS:
         return ""
     return text
@@ -186,7 +190,7 @@ def normalize_structured_rows(rows: list[dict[str, str]]) -> list[dict[str, str]
 
 
 def is_near_empty_text(value: str) -> bool:
-    stripped = re.sub(r"[^A-Za-z0-9]+", "", str(value or ""))
+    stripped = _NON_ALPHANUMERIC.sub("", str(value or ""))
     return len(stripped) < 8
 
 
@@ -10,6 +10,7 @@ import textwrap
 import streamlit as st
 from PIL import Image
 
+from core.executor import get_executor
 from core.session_state import AI_IMAGE_CAPTIONS_KEY, utc_timestamp
 from report_structuring import REPORT_HEADERS
 from services.openai_client import (
@@ -33,6 +34,8 @@ from services.model_routing import (
 )
 from services.usage_logging import log_usage_event
 
+CAPTION_IMAGES_PER_REQUEST = 6
+
 
 def uploaded_file_name(uploaded_file: object) -> str:
     name = str(getattr(uploaded_file, "name", "") or "").strip()
@@ -592,6 +595,7 @@ def generate_ai_photo_captions_for_reports(
     cache = photo_caption_cache()
     row_mapping = build_review_row_mapping(review_rows)
     caption_mapping: dict[tuple[str, str], list[str]] = {}
+    pending: list[tuple[tuple[str, str], list[bytes], str]] = []
 
     for key, images in image_mapping.items():
         normalized_key = (str(key[0]).strip(), str(key[1]).strip())
@@ -606,22 +610,40 @@ def generate_ai_photo_captions_for_reports(
             if isinstance(captions, list):
                 caption_mapping[normalized_key] = [str(item or "").strip() for item in captions]
                 continue
-
-        captions = request_image_captions_with_openai(
-            images,
-            api_key=api_key,
-            model=model,
-            discipline=discipline,
-            report_row=row_mapping[normalized_key],
-            persistent_guidance=persistent_guidance,
-            provider=provider,
-        )
-        cache[cache_key] = {
-            "signature": signature,
-            "captions": captions,
-            "created_at": utc_timestamp(),
-        }
-        caption_mapping[normalized_key] = captions
+        pending.append((normalized_key, list(images), signature))
+
+    if pending:
+        # Large photo groups are split so each vision request stays small, and
+        # the independent requests run concurrently instead of back to back.
+        executor = get_executor()
+        futures = [
+            (
+                normalized_key,
+                signature,
+                [
+                    executor.submit(
+                        request_image_captions_with_openai,
+                        images[index : index + CAPTION_IMAGES_PER_REQUEST],
+                        api_key=api_key,
+                        model=model,
+                        discipline=discipline,
+                        report_row=row_mapping[normalized_key],
+                        persistent_guidance=persistent_guidance,
+                        provider=provider,
+                    )
+                    for index in range(0, len(images), CAPTION_IMAGES_PER_REQUEST)
+                ],
+            )
+            for normalized_key, images, signature in pending
+        ]
+        for normalized_key, signature, chunk_futures in futures:
+            captions = [caption for future in chunk_futures for caption in future.result()]
+            cache[f"{normalized_key[0]}|{normalized_key[1]}"] = {
+                "signature": signature,
+                "captions": captions,
+                "created_at": utc_timestamp(),
+            }
+            caption_mapping[normalized_key] = captions
 
     st.session_state[AI_IMAGE_CAPTIONS_KEY] = cache
     return caption_mapping
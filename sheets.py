@@ -1,28 +1,79 @@
-import base64
-import json
-from typing import Dict, List
+from __future__ import annotations
 
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import TYPE_CHECKING, Dict, List
+
+import pandas as pd
 import streamlit as st
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from config import CACHE_FILE, SHEET_ID, SHEET_NAME
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from google.oauth2 import service_account
 
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+from config import CACHE_FILE, SHEET_ID, SHEET_NAME, SNAPSHOT_FILE
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    # Lets the revision probe read the file's Drive ``modifiedTime``.
+    "https://www.googleapis.com/auth/drive.metadata.readonly",
+]
+# googleapiclient retries 429 and 5xx responses with randomised exponential
+# backoff (1s, 2s, 4s, ...) when ``num_retries`` is set on ``execute``. Only
+# idempotent reads use it; appends retry rate limits themselves.
+SHEET_API_NUM_RETRIES = 4
+# Keeps each append request well inside the Sheets API payload limits.
+SHEET_APPEND_BATCH_ROWS = 500
 
 
 class GoogleSheetAccessError(RuntimeError):
     """Actionable Google Sheets access/configuration failure."""
 
 
+class PartialSheetAppendError(RuntimeError):
+    """An append failed after earlier batches were already written."""
+
+    def __init__(self, appended_rows: int, total_rows: int, cause: Exception):
+        super().__init__(
+            f"Appended {appended_rows} of {total_rows} rows before the sheet write failed: {cause}"
+        )
+        self.appended_rows = appended_rows
+        self.total_rows = total_rows
+
+
+def _json_loads(data: bytes | str):
+    """Decode JSON with orjson when available, else the stdlib parser."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj) -> bytes:
+    """Encode JSON to UTF-8 bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
 def _load_service_account_info() -> Dict:
     """Load the service account JSON from Streamlit secrets."""
 
     if "GOOGLE_CREDENTIALS" in st.secrets:
         raw_credentials = st.secrets["GOOGLE_CREDENTIALS"]
         if isinstance(raw_credentials, str):
-            return json.loads(raw_credentials)
+            return _json_loads(raw_credentials)
         return raw_credentials
     if "gcp_service_account" in st.secrets:
         return st.secrets["gcp_service_account"]
@@ -34,6 +85,7 @@ def _load_service_account_info() -> Dict:
 
 def get_service_account_credentials() -> service_account.Credentials:
     """Return Google service account credentials for the configured scopes."""
+    from google.oauth2 import service_account
 
     service_account_info = _load_service_account_info()
     return service_account.Credentials.from_service_account_info(
@@ -83,71 +135,446 @@ def _raise_actionable_sheet_error(operation: str, exc: HttpError):
     ) from exc
 
 
+@st.cache_resource(show_spinner=False)
+def _shared_service_account_credentials() -> service_account.Credentials:
+    # One credentials object per process keeps its access token between
+    # fetches instead of re-signing a token request on every cache miss.
+    return get_service_account_credentials()
+
+
+_idle_services: Dict[str, List] = {}
+_idle_services_lock = Lock()
+
+
+@contextmanager
+def _pooled_service(api_name: str, version: str):
+    """Lend an idle discovery client, building one only when all are in use.
+
+    ``httplib2.Http`` is not thread-safe, so a client serves one call site at
+    a time. Streamlit runs every rerun on a fresh script thread, so clients
+    are pooled process-wide instead of being kept per thread.
+    """
+    key = f"{api_name}_{version}"
+    with _idle_services_lock:
+        idle = _idle_services.setdefault(key, [])
+        service = idle.pop() if idle else None
+    if service is None:
+        # googleapiclient.discovery costs ~200 ms to import; only pay it when a
+        # sheet call actually misses the cache.
+        from googleapiclient.discovery import build
+
+        service = build(
+            api_name,
+            version,
+            credentials=_shared_service_account_credentials(),
+            cache_discovery=False,
+        )
+    try:
+        yield service
+    finally:
+        with _idle_services_lock:
+            _idle_services[key].append(service)
+
+
 def _build_service():
-    creds = get_service_account_credentials()
-    return build("sheets", "v4", credentials=creds)
+    return _pooled_service("sheets", "v4")
 
 
-@st.cache_data(ttl=300)
-def get_sheet_data() -> List[List[str]]:
-    """Fetch rows from the configured Google Sheet."""
-    service = _build_service()
-    sheet = service.spreadsheets()
+def _build_drive_service():
+    return _pooled_service("drive", "v3")
+
+
+# Open-ended row range (``A1:N``): the API only returns populated rows, so
+# there is no fixed row ceiling. Further tabs can be appended to ``ranges``.
+REPORT_FIRST_COLUMN = "A"
+REPORT_LAST_COLUMN = "N"
+REPORT_COLUMN_COUNT = 14
+# Partial response: only the cell values, without the range/majorDimension echo.
+SHEET_VALUES_FIELDS = "valueRanges(values)"
+
+
+_drive_probe_available = True
+
+
+def _sheet_modified_time() -> str:
+    """Return the spreadsheet's Drive ``modifiedTime``, or ``""`` if unavailable.
+
+    A 403/404 (Drive API disabled, scope not granted) switches the probe off
+    for the rest of the process so it does not cost a failing call per TTL.
+    """
+    global _drive_probe_available
+    if not _drive_probe_available:
+        return ""
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range=f"{SHEET_NAME}!A:N",
-        ).execute()
+        with _build_drive_service() as drive:
+            metadata = drive.files().get(
+                fileId=SHEET_ID,
+                fields="modifiedTime",
+                supportsAllDrives=True,
+            ).execute(num_retries=SHEET_API_NUM_RETRIES)
+    except HttpError as exc:
+        if _http_error_status(exc) in {403, 404}:
+            _drive_probe_available = False
+        return ""
+    return str(metadata.get("modifiedTime", "") or "")
+
+
+def _read_revision_token() -> str:
+    """Return the spreadsheet's Drive revision token, or ``""`` without one.
+
+    The Drive ``modifiedTime`` changes on any edit. Without Drive access no
+    cheap Sheets metadata tracks cell edits (the tab's ``rowCount`` is its
+    grid size), so an empty token is returned and the values cache simply
+    expires on its TTL.
+    """
+    modified_time = _sheet_modified_time()
+    if modified_time:
+        return f"{SHEET_NAME}@{modified_time}"
+    return ""
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _sheet_revision_token() -> str:
+    """Return the revision token, probed at most once a minute."""
+    return _read_revision_token()
+
+
+def _snapshot_source() -> str:
+    return f"{SHEET_ID}:{SHEET_NAME}"
+
+
+def _load_sheet_snapshot(revision_token: str) -> List[List[str]] | None:
+    """Return the snapshot rows saved for ``revision_token``, else ``None``.
+
+    Rows are only trusted for the exact revision they were read at; any other
+    token (or an empty one, when no revision probe is available) misses.
+    """
+    if not revision_token:
+        return None
+    try:
+        with open(SNAPSHOT_FILE, "rb") as fh:
+            snapshot = _json_loads(fh.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("source") != _snapshot_source():
+        return None
+    rows = snapshot.get("rows")
+    if snapshot.get("revision") != revision_token or not isinstance(rows, list):
+        return None
+    return rows
+
+
+def _save_sheet_snapshot(revision_token: str, rows: List[List[str]]) -> None:
+    """Atomically rewrite the snapshot; a failed write only costs a full read.
+
+    Each write goes through its own temporary file because the refresher
+    thread and script threads may save at the same time.
+    """
+    payload = {"source": _snapshot_source(), "revision": revision_token, "rows": rows}
+    try:
+        fd, tmp_path = tempfile.mkstemp(
+            dir=SNAPSHOT_FILE.parent, prefix=f"{SNAPSHOT_FILE.name}.", suffix=".tmp"
+        )
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_json_dumps(payload))
+        os.replace(tmp_path, SNAPSHOT_FILE)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def drop_sheet_snapshot() -> None:
+    """Forget the on-disk snapshot so the next read goes to the API."""
+    try:
+        os.remove(SNAPSHOT_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def _read_sheet_rows() -> List[List[str]]:
+    """Read every report row from the sheet, padded to the report width."""
+    try:
+        with _build_service() as service:
+            result = service.spreadsheets().values().batchGet(
+                spreadsheetId=SHEET_ID,
+                ranges=[f"{SHEET_NAME}!{REPORT_FIRST_COLUMN}1:{REPORT_LAST_COLUMN}"],
+                majorDimension="ROWS",
+                fields=SHEET_VALUES_FIELDS,
+            ).execute(num_retries=SHEET_API_NUM_RETRIES)
     except HttpError as exc:
         _raise_actionable_sheet_error("reading rows", exc)
-    rows = result.get("values", [])
-    expected_cols = 14
-    padded_rows = [row + [""] * max(0, expected_cols - len(row)) for row in rows]
-    return padded_rows
+    value_ranges = result.get("valueRanges", [])
+    rows = value_ranges[0].get("values", []) if value_ranges else []
+    # The rows are freshly decoded, so pad in place: full-width rows (the
+    # common case) cost no allocation at all.
+    for row in rows:
+        missing = REPORT_COLUMN_COUNT - len(row)
+        if missing > 0:
+            row.extend([""] * missing)
+    return rows
+
+
+def _load_sheet_rows(revision_token: str) -> List[List[str]]:
+    """Return rows for one sheet revision from the snapshot or the API.
+
+    A new token always re-reads the whole range, so edits, inserts and
+    deletes anywhere in the sheet are picked up. The on-disk snapshot only
+    lets a restarted process skip the read while the revision is unchanged.
+    """
+    rows = _load_sheet_snapshot(revision_token)
+    if rows is not None:
+        return rows
+    rows = _read_sheet_rows()
+    if revision_token:
+        _save_sheet_snapshot(revision_token, rows)
+    return rows
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_sheet_rows(revision_token: str) -> List[List[str]]:
+    """Fetch rows for one sheet revision; ``revision_token`` is the cache key."""
+    return _load_sheet_rows(revision_token)
+
+
+SHEET_REFRESH_INTERVAL_SECONDS = 240
+# The refresher stops once no script has asked for rows for this long.
+SHEET_REFRESH_IDLE_SECONDS = 900
+
+
+class SheetRowsRefresher:
+    """Process-wide slot kept warm by a daemon thread re-checking the sheet.
+
+    Background threads have no Streamlit script context, so the rows live on
+    this shared object rather than in ``st.session_state``, and the thread
+    calls the uncached probe and read helpers instead of the ``st.cache_data``
+    wrappers. Each pass probes the revision token and only reads values when
+    it changed; with no sessions asking for rows the thread exits and drops
+    its rows.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = SHEET_REFRESH_INTERVAL_SECONDS,
+        idle_seconds: float = SHEET_REFRESH_IDLE_SECONDS,
+    ):
+        self.interval_seconds = interval_seconds
+        self.idle_seconds = idle_seconds
+        self._lock = Lock()
+        self._rows: List[List[str]] | None = None
+        self._revision_token = ""
+        self._thread: Thread | None = None
+        self._stopped = Event()
+        self._last_used = time.monotonic()
+
+    def latest(self) -> List[List[str]] | None:
+        with self._lock:
+            return None if self._rows is None else list(self._rows)
+
+    def store(self, rows: List[List[str]], revision_token: str = "") -> None:
+        with self._lock:
+            self._rows = list(rows)
+            self._revision_token = revision_token
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rows = None
+            self._revision_token = ""
+
+    def refresh(self) -> None:
+        """Re-check the sheet once; failures keep the previous rows."""
+        try:
+            revision_token = _read_revision_token()
+            with self._lock:
+                if revision_token and revision_token == self._revision_token:
+                    return
+            rows = _load_sheet_rows(revision_token)
+        except Exception:
+            return
+        self.store(rows, revision_token)
+
+    def ensure_started(self) -> None:
+        """Record a use of the rows and start the thread if it is not running."""
+        with self._lock:
+            self._last_used = time.monotonic()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = Thread(
+                target=self._run, name="sheet-rows-refresher", daemon=True
+            )
+            self._thread.start()
+
+    def _idle_stop(self) -> bool:
+        with self._lock:
+            if time.monotonic() - self._last_used < self.idle_seconds:
+                return False
+            # Stale rows must not outlive the thread that keeps them fresh.
+            self._rows = None
+            self._revision_token = ""
+            self._thread = None
+            return True
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds):
+            if self._idle_stop():
+                return
+            self.refresh()
+
+
+@st.cache_resource(show_spinner=False)
+def get_sheet_rows_refresher() -> SheetRowsRefresher:
+    return SheetRowsRefresher()
+
+
+def get_sheet_data() -> List[List[str]]:
+    """Fetch rows from the configured Google Sheet.
+
+    Rows kept warm by the background refresher are served first; the first
+    run falls back to the cached synchronous read and seeds the refresher.
+    """
+    refresher = get_sheet_rows_refresher()
+    rows = refresher.latest()
+    if rows is None:
+        revision_token = _sheet_revision_token()
+        rows = _fetch_sheet_rows(revision_token)
+        refresher.store(rows, revision_token)
+    refresher.ensure_started()
+    return rows
+
+
+def clear_sheet_data_cache(*, drop_snapshot: bool = False) -> None:
+    """Drop cached sheet metadata and rows so the next read hits the API.
+
+    With ``drop_snapshot`` the on-disk snapshot goes too, so a restarted
+    process cannot serve it either.
+    """
+    if drop_snapshot:
+        drop_sheet_snapshot()
+    _sheet_revision_token.clear()
+    _fetch_sheet_rows.clear()
+    get_sheet_rows_refresher().reset()
+
+
+def _execute_append(request):
+    """Execute a ``values.append`` request, retrying only 429 responses.
+
+    An append is not idempotent: a 5xx or dropped connection can follow a
+    write the server already committed, and retrying it would duplicate the
+    rows. A rate-limit rejection is never applied, so it is safe to resend.
+    """
+    for attempt in range(SHEET_API_NUM_RETRIES + 1):
+        try:
+            return request.execute()
+        except HttpError as exc:
+            if _http_error_status(exc) != 429 or attempt == SHEET_API_NUM_RETRIES:
+                raise
+            time.sleep(random.random() * 2**attempt)
 
 
 def append_rows_to_sheet(rows: List[List[str]]):
+    """Append rows to the sheet, one ``values.append`` call per batch.
+
+    Raises :class:`PartialSheetAppendError` when a batch fails after earlier
+    ones landed, so callers can avoid resending the rows already written.
+    """
     if not rows:
         return
-    service = _build_service()
-    body = {"values": rows}
+    appended = 0
     try:
-        service.spreadsheets().values().append(
-            spreadsheetId=SHEET_ID,
-            range=SHEET_NAME,
-            valueInputOption="USER_ENTERED",
-            body=body,
-        ).execute()
-    except HttpError as exc:
-        _raise_actionable_sheet_error("appending rows", exc)
+        with _build_service() as service:
+            values = service.spreadsheets().values()
+            for start in range(0, len(rows), SHEET_APPEND_BATCH_ROWS):
+                batch = rows[start : start + SHEET_APPEND_BATCH_ROWS]
+                try:
+                    _execute_append(
+                        values.append(
+                            spreadsheetId=SHEET_ID,
+                            range=SHEET_NAME,
+                            valueInputOption="USER_ENTERED",
+                            body={"values": batch},
+                        )
+                    )
+                except HttpError as exc:
+                    _raise_actionable_sheet_error("appending rows", exc)
+                appended += len(batch)
+    except Exception as exc:
+        if appended:
+            raise PartialSheetAppendError(appended, len(rows), exc) from exc
+        raise
+    finally:
+        # Earlier batches may have landed even when a later one fails. The
+        # snapshot goes too: Drive's modifiedTime can lag a values write, and
+        # an unchanged token would otherwise reload the pre-append rows.
+        clear_sheet_data_cache(drop_snapshot=True)
 
 
 def load_offline_cache() -> Dict:
     if CACHE_FILE.exists():
         try:
-            with open(CACHE_FILE, "r") as fh:
-                return json.load(fh)
+            with open(CACHE_FILE, "rb") as fh:
+                return _json_loads(fh.read())
         except Exception:
             return None
     return None
 
 
-def save_offline_cache(rows: List[List[str]], uploads: Dict):
-    data = {
-        "rows": rows,
-        "uploads": {
-            f"{site}|{date}": [
-                {"name": f.name, "data": base64.b64encode(f.getbuffer()).decode("utf-8")}
-                for f in (files or [])
-            ]
-            for (site, date), files in uploads.items()
-        },
-    }
-    with open(CACHE_FILE, "w") as fh:
-        json.dump(data, fh)
+def _offline_uploads_dir() -> Path:
+    return CACHE_FILE.with_name(f"{CACHE_FILE.stem}_uploads")
+
+
+def _write_offline_cache(cache: Dict) -> None:
+    """Atomically rewrite the offline cache JSON so a crash never truncates it."""
+    tmp_path = CACHE_FILE.with_name(f"{CACHE_FILE.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(_json_dumps(cache))
+    os.replace(tmp_path, CACHE_FILE)
+
+
+def drop_synced_offline_rows(count: int) -> None:
+    """Remove the first ``count`` rows from the offline cache after a partial sync."""
+    cache = load_offline_cache()
+    if not cache:
+        return
+    cache["rows"] = cache.get("rows", [])[count:]
+    _write_offline_cache(cache)
+
+
+def clear_offline_cache() -> None:
+    """Remove the offline cache file, then any uploads stored beside it.
+
+    The JSON goes first so an interrupted clear leaves orphaned files rather
+    than a cache pointing at missing uploads.
+    """
+    CACHE_FILE.unlink(missing_ok=True)
+    shutil.rmtree(_offline_uploads_dir(), ignore_errors=True)
+
+
+def sheet_rows_fingerprint(rows: List[List[str]]) -> int:
+    """Return a cheap content hash of sheet rows for use as a cache key.
 
+    Streamlit's default hasher walks every cell of a list of lists on each
+    rerun, which on a few thousand rows costs more than the cached work.
+    """
+    return hash(tuple(map(tuple, rows)))
 
+
+@st.cache_data(show_spinner=False, hash_funcs={list: sheet_rows_fingerprint})
 def get_unique_sites_and_dates(rows: List[List[str]]):
-    sites = sorted({row[1].strip() for row in rows if len(row) > 1 and row[1].strip()})
-    dates = sorted({row[0].strip() for row in rows if len(row) > 0 and row[0].strip()})
-    return sites, dates
+    """Return the sorted unique sites and dates.
+
+    The result is cached per rows fingerprint, so the sort runs once per
+    sheet revision rather than on every rerun. Stripping runs column-wise
+    instead of once per cell.
+    """
+    frame = pd.DataFrame(rows)
+
+    def _unique_column(position: int) -> List[str]:
+        if position not in frame.columns:
+            return []
+        values = frame[position].dropna().astype(str).str.strip()
+        return sorted(values[values != ""].unique().tolist())
+
+    return _unique_column(1), _unique_column(0)
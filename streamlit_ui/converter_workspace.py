@@ -37,7 +37,7 @@ from services.openai_client import (
     provider_supports_openai_responses_tools,
 )
 from services.research_service import ensure_knowledge_vector_store
-from sheets import append_rows_to_sheet, get_sheet_data
+from sheets import append_rows_to_sheet, clear_sheet_data_cache
 from streamlit_ui.helpers import (
     safe_audio,
     safe_audio_input,
@@ -146,9 +146,7 @@ def clear_parsed_rows() -> None:
 
 
 def clear_cached_sheet_data() -> None:
-    clear_fn = getattr(get_sheet_data, "clear", None)
-    if callable(clear_fn):
-        clear_fn()
+    clear_sheet_data_cache(drop_snapshot=True)
 
 
 def rows_for_sheet_append(rows: list[dict[str, str]]) -> list[list[str]]:
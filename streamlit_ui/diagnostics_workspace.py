@@ -23,15 +23,13 @@ from core.session_state import (
 from services.openai_client import active_ai_provider, default_ai_model, load_ai_api_key, openai_sdk_ready, provider_label
 from services.self_healing_service import request_self_healing_analysis_with_openai
 from services.usage_logging import read_usage_events, usage_counts
-from sheets import get_sheet_data
+from sheets import clear_sheet_data_cache
 from streamlit_ui.helpers import safe_columns, safe_markdown, safe_rerun, safe_text_area, safe_write
 from streamlit_ui.layout import render_kpi_strip, render_note, render_section_header, render_subsection
 
 
 def clear_cached_sheet_data() -> None:
-    clear_fn = getattr(get_sheet_data, "clear", None)
-    if callable(clear_fn):
-        clear_fn()
+    clear_sheet_data_cache(drop_snapshot=True)
 
 
 def apply_self_healing_actions(actions: list[str]) -> list[str]:
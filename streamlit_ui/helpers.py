@@ -262,6 +262,17 @@ def safe_audio_input(label: str, **kwargs):
     return None
 
 
+def safe_fragment(fn):
+    """Wrap ``fn`` in st.fragment so its widgets rerun only that section."""
+    fragment_fn = getattr(st, "fragment", None)
+    if callable(fragment_fn):
+        try:
+            return fragment_fn(fn)
+        except TypeError:
+            return fn
+    return fn
+
+
 def safe_rerun() -> None:
     rerun_fn = getattr(st, "rerun", None)
     if callable(rerun_fn):
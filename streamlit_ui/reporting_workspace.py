@@ -11,7 +11,16 @@ from report_structuring import REPORT_HEADERS
 from services.converter_service import normalize_structured_rows
 from services.media_service import generate_ai_photo_captions_for_reports
 from services.openai_client import active_ai_provider, default_ai_model, load_ai_api_key, openai_sdk_ready, provider_label
-from sheets import CACHE_FILE, append_rows_to_sheet, get_sheet_data, get_unique_sites_and_dates, load_offline_cache
+from sheets import (
+    PartialSheetAppendError,
+    append_rows_to_sheet,
+    clear_offline_cache,
+    drop_synced_offline_rows,
+    get_sheet_data,
+    get_unique_sites_and_dates,
+    load_offline_cache,
+    sheet_rows_fingerprint,
+)
 from streamlit_ui.clipboard_image_paste import render_clipboard_image_paste
 from streamlit_ui.helpers import (
     safe_button,
@@ -22,6 +31,7 @@ from streamlit_ui.helpers import (
     safe_data_editor,
     safe_expander,
     safe_file_uploader,
+    safe_fragment,
     safe_image,
     safe_markdown,
     safe_multiselect,
@@ -60,6 +70,90 @@ def rows_to_structured_data(rows: list[list[str]]) -> list[dict[str, str]]:
     return structured
 
 
+REVIEW_SCOPE_STATE_KEY = "_review_scope"
+# The read-only preview is a glance; every scoped row stays in the editor below.
+REVIEW_PREVIEW_MAX_ROWS = 500
+
+
+@st.cache_resource(show_spinner=False, max_entries=4, hash_funcs={list: sheet_rows_fingerprint})
+def sheet_rows_frame(data_rows: list[list[str]]) -> pd.DataFrame:
+    """Return sheet rows as a DataFrame with stripped ``_site``/``_date`` key columns.
+
+    The frame is shared across reruns and sessions (no per-rerun copy), so
+    callers must treat it as read-only.
+    """
+    header_count = len(REPORT_HEADERS)
+    frame = pd.DataFrame(
+        [(list(row) + [""] * header_count)[:header_count] for row in data_rows],
+        columns=REPORT_HEADERS,
+    )
+    frame["_site"] = frame["Site_Name"].astype(str).str.strip()
+    frame["_date"] = frame["Date"].astype(str).str.strip()
+    return frame
+
+
+def _site_date_key_hash(frame: pd.DataFrame) -> int:
+    return int(pd.util.hash_pandas_object(frame[["_site", "_date"]], index=False).sum())
+
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _site_date_key_hash})
+def site_dates_index(frame: pd.DataFrame) -> dict[str, tuple[str, ...]]:
+    """Return each stripped site mapped to its sorted unique dates."""
+    pairs = frame[["_site", "_date"]].drop_duplicates()
+    return {site: tuple(sorted(dates)) for site, dates in pairs.groupby("_site", sort=False)["_date"]}
+
+
+def dates_for_sites(index: dict[str, tuple[str, ...]], sites: list[str]) -> list[str]:
+    """Return the sorted dates available for ``sites``.
+
+    Callers pass the resolved site list, which leaves out blank sites, so
+    dates from rows without a site never reach the filter.
+    """
+    return sorted(set().union(*(index.get(site, ()) for site in sites)))
+
+
+def scope_frame(frame: pd.DataFrame, selected_sites: list[str], selected_dates: list[str]) -> pd.DataFrame:
+    """Return the rows whose site and date are both in scope."""
+    mask = frame["_site"].isin(selected_sites) & frame["_date"].isin(selected_dates)
+    return frame[mask]
+
+
+def review_scope(
+    frame: pd.DataFrame,
+    selected_sites_raw: list[str],
+    selected_dates_raw: list[str],
+    selected_sites: list[str],
+    selected_dates: list[str],
+) -> dict[str, object]:
+    """Return the scoped preview frame and its derived values.
+
+    Uploads, sliders and toggles rerun the whole script; while the sheet frame
+    and the Step 1 filters are unchanged the previous scope is reused instead
+    of re-masking and re-slicing the sheet.
+    """
+    key = (tuple(selected_sites_raw), tuple(selected_dates_raw))
+    cached = st.session_state.get(REVIEW_SCOPE_STATE_KEY)
+    if isinstance(cached, dict) and cached.get("frame") is frame and cached.get("key") == key:
+        return cached
+
+    # Mask even for the default "all sites / all dates" scope: the resolved
+    # lists leave out blank sites, so empty sheet rows stay out of scope.
+    filtered_frame = scope_frame(frame, selected_sites, selected_dates)
+    preview = filtered_frame[REPORT_HEADERS].reset_index(drop=True)
+    scope = {
+        "frame": frame,
+        "key": key,
+        "preview": preview,
+        "rows": preview.values.tolist(),
+        "site_count": filtered_frame["_site"].nunique(),
+        "site_date_pairs": sorted(
+            filtered_frame[["_site", "_date"]].drop_duplicates().itertuples(index=False, name=None)
+        ),
+    }
+    st.session_state[REVIEW_SCOPE_STATE_KEY] = scope
+    return scope
+
+
 def normalized_review_rows(df: pd.DataFrame) -> list[list[str]]:
     if df is None or df.empty:
         return []
@@ -184,7 +278,7 @@ def append_images_to_group(normalized_key: tuple[str, str], images: list[bytes])
         return (st.session_state.get("images", {}) or {}).get(normalized_key, [])
     image_store = st.session_state.setdefault("images", {})
     current_group = list(image_store.get(normalized_key, []) or [])
-    current_group.extend(bytes(image) for image in images if image)
+    current_group.extend(image if isinstance(image, bytes) else bytes(image) for image in images if image)
     image_store[normalized_key] = current_group
     st.session_state["images"] = image_store
     return current_group
@@ -194,7 +288,8 @@ def uploaded_file_bytes(uploaded_file: object) -> bytes:
     """Read one uploaded file without permanently advancing its stream when possible."""
     getvalue_fn = getattr(uploaded_file, "getvalue", None)
     if callable(getvalue_fn):
-        return bytes(getvalue_fn() or b"")
+        data = getvalue_fn() or b""
+        return data if isinstance(data, bytes) else bytes(data)
 
     read_fn = getattr(uploaded_file, "read", None)
     if not callable(read_fn):
@@ -218,12 +313,17 @@ def uploaded_file_bytes(uploaded_file: object) -> bytes:
     return data
 
 
-def uploaded_image_signature(files: list[object]) -> str:
-    """Return a stable signature for uploaded image files."""
+def uploaded_image_signature(files: list[object], payloads: list[bytes] | None = None) -> str:
+    """Return a stable signature for uploaded image files.
+
+    Pass ``payloads`` when the file bytes were already read so each upload is
+    only pulled out of its buffer once.
+    """
     digest = hashlib.sha256()
-    for uploaded_file in files or []:
+    if payloads is None:
+        payloads = [uploaded_file_bytes(uploaded_file) for uploaded_file in files or []]
+    for uploaded_file, data in zip(files or [], payloads):
         name = str(getattr(uploaded_file, "name", "") or "").strip()
-        data = uploaded_file_bytes(uploaded_file)
         digest.update(name.encode("utf-8"))
         digest.update(len(data).to_bytes(8, "big", signed=False))
         digest.update(hashlib.sha256(data).digest())
@@ -240,21 +340,18 @@ def append_new_uploaded_images(
     if not files:
         return (st.session_state.get("images", {}) or {}).get(normalized_key, [])
 
-    signature = uploaded_image_signature(files)
+    # UploadedFile buffers hand back their bytes without copying; read them
+    # once and reuse the same objects for the signature and the image store.
+    payloads = [uploaded_file_bytes(uploaded_file) for uploaded_file in files]
+    signature = uploaded_image_signature(files, payloads)
     signature_store = st.session_state.setdefault("_image_upload_signatures", {})
     current_group = (st.session_state.get("images", {}) or {}).get(normalized_key, [])
     if signature_store.get(upload_key) == signature and current_group:
         return current_group
 
-    image_bytes: list[bytes] = []
-    for uploaded_file in files:
-        data = uploaded_file_bytes(uploaded_file)
-        if data:
-            image_bytes.append(data)
-
     signature_store[upload_key] = signature
     st.session_state["_image_upload_signatures"] = signature_store
-    return append_images_to_group(normalized_key, image_bytes)
+    return append_images_to_group(normalized_key, [data for data in payloads if data])
 
 
 def render_output_settings_panel() -> dict[str, object]:
@@ -305,6 +402,107 @@ def render_output_settings_panel() -> dict[str, object]:
     }
 
 
+def render_report_output_section(
+    review_rows: list[list[str]],
+    *,
+    discipline: str,
+    site_date_pairs: list[tuple[str, str]],
+    attached_photo_groups: int,
+    missing_photo_groups: int,
+    record_runtime_issue,
+    active_guidance_text,
+    generate_reports_fn=generate_reports,
+) -> None:
+    """Render Step 4; run as a fragment so output-setting changes rerun only this card."""
+    with safe_container(border=True):
+        render_card_header(
+            "Step 4",
+            "Report Output",
+            "Review readiness, adjust low-frequency output settings only when needed, and generate the final report package.",
+            badge="Primary action",
+        )
+        gallery_settings = render_output_settings_panel()
+        caption_status = "AI captions on" if gallery_settings["auto_caption_images"] else "AI captions off"
+        render_status_badges(
+            [
+                (f"{len(review_rows)} row(s) ready", "neutral"),
+                (
+                    f"{attached_photo_groups}/{len(site_date_pairs)} photo groups attached" if site_date_pairs else "No photo groups in scope",
+                    "success" if attached_photo_groups or not site_date_pairs else "warning",
+                ),
+                (
+                    f"{missing_photo_groups} group(s) missing photos" if missing_photo_groups else "No missing photo groups",
+                    "warning" if missing_photo_groups else "success",
+                ),
+                (caption_status, "neutral"),
+            ]
+        )
+        safe_caption("Reports are generated as DOCX files packaged into one ZIP using the current scope and output settings.")
+
+        if safe_button("Generate Reports", type="primary", use_container_width=True):
+            if not review_rows:
+                st.warning("No data is available for the selected sites and dates.")
+                return
+
+            try:
+                image_mapping = st.session_state.get("images", {})
+                image_caption_mapping = None
+                if gallery_settings["auto_caption_images"] and image_mapping:
+                    active_provider = active_ai_provider()
+                    provider_name = provider_label(active_provider)
+                    api_key = load_ai_api_key(active_provider)
+                    sdk_ready, sdk_error = openai_sdk_ready()
+                    if api_key and sdk_ready:
+                        try:
+                            with safe_spinner(f"Generating AI photo captions with {provider_name}..."):
+                                image_caption_mapping = generate_ai_photo_captions_for_reports(
+                                    review_rows,
+                                    image_mapping,
+                                    api_key=api_key,
+                                    model=default_ai_model(active_provider),
+                                    discipline=discipline,
+                                    persistent_guidance=active_guidance_text("captions", "converter"),
+                                    provider=active_provider,
+                                )
+                        except Exception as caption_error:
+                            image_caption_mapping = fallback_caption_mapping_for_images(image_mapping)
+                            st.warning("AI photo captions failed and were skipped. Report export will continue.")
+                            record_runtime_issue(
+                                "photo_captioning",
+                                "AI photo captions failed; report export continued with fallback captions.",
+                                details=str(caption_error),
+                            )
+                    elif not sdk_ready:
+                        st.warning(f"Photo captions skipped because the OpenAI-compatible SDK is unavailable. {sdk_error}")
+                    else:
+                        st.warning(f"Photo captions skipped because no {provider_name} API key is configured.")
+
+                zip_bytes = generate_reports_with_gallery_options(
+                    review_rows,
+                    image_mapping,
+                    discipline,
+                    int(gallery_settings["img_width_mm"]),
+                    int(gallery_settings["img_height_mm"]),
+                    int(gallery_settings["spacing_mm"]),
+                    add_border=bool(gallery_settings["add_border"]),
+                    show_photo_placeholders=bool(gallery_settings["show_photo_placeholders"]),
+                    image_caption_mapping=image_caption_mapping,
+                    generate_reports_fn=generate_reports_fn,
+                )
+            except Exception as exc:
+                st.error(f"Failed to generate reports: {exc}")
+                record_runtime_issue("report_generation", "Report generation failed.", details=str(exc))
+            else:
+                st.download_button(
+                    "Download report ZIP",
+                    zip_bytes,
+                    "reports.zip",
+                    mime="application/zip",
+                    type="primary",
+                    use_container_width=True,
+                )
+
+
 def render_reporting_workspace(
     *,
     record_runtime_issue,
@@ -332,6 +530,8 @@ def render_reporting_workspace(
         st.error(f"Failed to load site data: {data_error}")
         record_runtime_issue("sheet_data", "Failed to load site data.", details=str(data_error))
         return
+    rows_frame = sheet_rows_frame(data_rows)
+    dates_index = site_dates_index(rows_frame)
 
     cache = load_offline_cache_fn()
     if cache and cache.get("rows"):
@@ -339,9 +539,12 @@ def render_reporting_workspace(
         if safe_button("Sync cached data to Google Sheet", type="secondary"):
             try:
                 append_rows_to_sheet_fn(cache.get("rows", []))
-                CACHE_FILE.unlink()
+                clear_offline_cache()
                 st.success("Cached data synced to Google Sheet.")
             except Exception as exc:  # pragma: no cover - user notification
+                if isinstance(exc, PartialSheetAppendError):
+                    # Keep only the unsent rows so a retry does not duplicate them.
+                    drop_synced_offline_rows(exc.appended_rows)
                 st.error(f"Sync failed: {exc}")
                 record_runtime_issue("sheet_sync", "Failed to sync cached data to Google Sheet.", details=str(exc))
 
@@ -374,13 +577,7 @@ def render_reporting_workspace(
             )
 
         selected_sites = sites.copy() if not selected_sites_raw else list(selected_sites_raw)
-        available_dates = sorted(
-            {
-                row[0].strip()
-                for row in data_rows
-                if not selected_sites or row[1].strip() in selected_sites
-            }
-        )
+        available_dates = dates_for_sites(dates_index, selected_sites)
         sanitize_multiselect_state("dates_ms", available_dates)
 
         with control_columns[2]:
@@ -406,7 +603,7 @@ def render_reporting_workspace(
             selected_sites_raw = []
             selected_dates_raw = []
             selected_sites = sites.copy()
-            available_dates = sorted({row[0].strip() for row in data_rows})
+            available_dates = dates_for_sites(dates_index, sites)
             safe_rerun()
 
         selected_dates = available_dates.copy() if not selected_dates_raw else list(selected_dates_raw)
@@ -418,15 +615,22 @@ def render_reporting_workspace(
             ]
         )
 
-    filtered_rows = [row for row in data_rows if row[1].strip() in selected_sites and row[0].strip() in selected_dates]
-    site_date_pairs = sorted({(row[1].strip(), row[0].strip()) for row in filtered_rows})
+    scope = review_scope(
+        rows_frame,
+        list(selected_sites_raw),
+        list(selected_dates_raw),
+        selected_sites,
+        selected_dates,
+    )
+    filtered_rows = scope["rows"]
+    site_date_pairs = scope["site_date_pairs"]
     image_mapping = st.session_state.get("images", {})
     attached_photo_groups = count_attached_photo_groups(site_date_pairs, image_mapping)
     missing_photo_groups = max(len(site_date_pairs) - attached_photo_groups, 0)
     render_kpi_strip(
         [
             ("Rows in scope", len(filtered_rows), "Current rows after the active scope."),
-            ("Sites", len({row[1].strip() for row in filtered_rows}), "Unique sites represented in this export."),
+            ("Sites", scope["site_count"], "Unique sites represented in this export."),
             ("Site/date sets", len(site_date_pairs), "Distinct report groups for upload and export."),
             ("Photo groups ready", attached_photo_groups, "Site/date groups that already have attached photos."),
             ("Missing photo groups", missing_photo_groups, "Groups that still need photo attachments before export."),
@@ -439,8 +643,12 @@ def render_reporting_workspace(
             "Review Data",
             "Review and edit report content before generation. Date and Site_Name remain locked to preserve file mapping.",
         )
-        df_preview = pd.DataFrame(filtered_rows, columns=REPORT_HEADERS)
-        st.dataframe(df_preview, width="stretch")
+        df_preview = scope["preview"]
+        st.dataframe(df_preview.head(REVIEW_PREVIEW_MAX_ROWS), width="stretch")
+        if len(df_preview) > REVIEW_PREVIEW_MAX_ROWS:
+            safe_caption(
+                f"Showing the first {REVIEW_PREVIEW_MAX_ROWS} of {len(df_preview)} rows; every row stays editable below."
+            )
         safe_caption("Locked fields in the editor: Date, Site_Name.")
         review_df = safe_data_editor(
             df_preview,
@@ -503,92 +711,16 @@ def render_reporting_workspace(
                 if captions:
                     safe_caption("AI captions: " + " | ".join(str(caption or "").strip() for caption in captions))
 
-    with safe_container(border=True):
-        render_card_header(
-            "Step 4",
-            "Report Output",
-            "Review readiness, adjust low-frequency output settings only when needed, and generate the final report package.",
-            badge="Primary action",
-        )
-        gallery_settings = render_output_settings_panel()
-        caption_status = "AI captions on" if gallery_settings["auto_caption_images"] else "AI captions off"
-        render_status_badges(
-            [
-                (f"{len(review_rows)} row(s) ready", "neutral"),
-                (
-                    f"{attached_photo_groups}/{len(site_date_pairs)} photo groups attached" if site_date_pairs else "No photo groups in scope",
-                    "success" if attached_photo_groups or not site_date_pairs else "warning",
-                ),
-                (
-                    f"{missing_photo_groups} group(s) missing photos" if missing_photo_groups else "No missing photo groups",
-                    "warning" if missing_photo_groups else "success",
-                ),
-                (caption_status, "neutral"),
-            ]
-        )
-        safe_caption("Reports are generated as DOCX files packaged into one ZIP using the current scope and output settings.")
-
-        if safe_button("Generate Reports", type="primary", use_container_width=True):
-            if not review_rows:
-                st.warning("No data is available for the selected sites and dates.")
-                return
-
-            try:
-                image_mapping = st.session_state.get("images", {})
-                image_caption_mapping = None
-                if gallery_settings["auto_caption_images"] and image_mapping:
-                    active_provider = active_ai_provider()
-                    provider_name = provider_label(active_provider)
-                    api_key = load_ai_api_key(active_provider)
-                    sdk_ready, sdk_error = openai_sdk_ready()
-                    if api_key and sdk_ready:
-                        try:
-                            with safe_spinner(f"Generating AI photo captions with {provider_name}..."):
-                                image_caption_mapping = generate_ai_photo_captions_for_reports(
-                                    review_rows,
-                                    image_mapping,
-                                    api_key=api_key,
-                                    model=default_ai_model(active_provider),
-                                    discipline=discipline,
-                                    persistent_guidance=active_guidance_text("captions", "converter"),
-                                    provider=active_provider,
-                                )
-                        except Exception as caption_error:
-                            image_caption_mapping = fallback_caption_mapping_for_images(image_mapping)
-                            st.warning("AI photo captions failed and were skipped. Report export will continue.")
-                            record_runtime_issue(
-                                "photo_captioning",
-                                "AI photo captions failed; report export continued with fallback captions.",
-                                details=str(caption_error),
-                            )
-                    elif not sdk_ready:
-                        st.warning(f"Photo captions skipped because the OpenAI-compatible SDK is unavailable. {sdk_error}")
-                    else:
-                        st.warning(f"Photo captions skipped because no {provider_name} API key is configured.")
-
-                zip_bytes = generate_reports_with_gallery_options(
-                    review_rows,
-                    image_mapping,
-                    discipline,
-                    int(gallery_settings["img_width_mm"]),
-                    int(gallery_settings["img_height_mm"]),
-                    int(gallery_settings["spacing_mm"]),
-                    add_border=bool(gallery_settings["add_border"]),
-                    show_photo_placeholders=bool(gallery_settings["show_photo_placeholders"]),
-                    image_caption_mapping=image_caption_mapping,
-                    generate_reports_fn=generate_reports_fn,
-                )
-            except Exception as exc:
-                st.error(f"Failed to generate reports: {exc}")
-                record_runtime_issue("report_generation", "Report generation failed.", details=str(exc))
-            else:
-                st.download_button(
-                    "Download report ZIP",
-                    zip_bytes,
-                    "reports.zip",
-                    type="primary",
-                    use_container_width=True,
-                )
+    safe_fragment(render_report_output_section)(
+        review_rows,
+        discipline=discipline,
+        site_date_pairs=site_date_pairs,
+        attached_photo_groups=attached_photo_groups,
+        missing_photo_groups=missing_photo_groups,
+        record_runtime_issue=record_runtime_issue,
+        active_guidance_text=active_guidance_text,
+        generate_reports_fn=generate_reports_fn,
+    )
 
-    st.session_state["structured_report_data"] = normalize_structured_rows(rows_to_structured_data(review_rows))
+    st.session_state["structured_report_data"] = normalize_structured_rows(structured_from_rows)
     safe_markdown("---")
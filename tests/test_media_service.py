@@ -0,0 +1,30 @@
+import types
+
+from services import media_service
+
+
+def test_generate_ai_photo_captions_splits_large_groups_and_keeps_order(monkeypatch):
+    st_stub = types.SimpleNamespace(session_state={})
+    monkeypatch.setattr(media_service, "st", st_stub)
+    requested_batches = []
+
+    def _fake_captions(images, **_kwargs):
+        requested_batches.append(list(images))
+        return [image.decode("utf-8").upper() for image in images]
+
+    monkeypatch.setattr(media_service, "request_image_captions_with_openai", _fake_captions)
+    images = [f"photo-{index}".encode("utf-8") for index in range(8)]
+    review_rows = [["2026-04-18", "Site A"] + [""] * 12]
+
+    captions = media_service.generate_ai_photo_captions_for_reports(
+        review_rows,
+        {("Site A", "2026-04-18"): images},
+        api_key="key",
+        model="gpt-4o-mini",
+        discipline="Civil",
+    )
+
+    assert sorted(len(batch) for batch in requested_batches) == [2, media_service.CAPTION_IMAGES_PER_REQUEST]
+    assert captions[("Site A", "2026-04-18")] == [f"PHOTO-{index}" for index in range(8)]
+    cached = st_stub.session_state[media_service.AI_IMAGE_CAPTIONS_KEY]["Site A|2026-04-18"]
+    assert cached["captions"] == captions[("Site A", "2026-04-18")]
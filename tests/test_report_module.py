@@ -22,6 +22,14 @@ PORTRAIT_PNG = _png_bytes(320, 640)
 
 def test_safe_filename():
     assert report.safe_filename('inv?lid:name') == 'inv-lid-name'
+
+
+def test_safe_filename_fast_path_matches_regex_cleanup():
+    assert report.safe_filename(" Site A_06.08.2025. ") == "Site A_06.08.2025"
+    assert report.safe_filename("Site\tA") == "Site A"
+    assert report.safe_filename("Site  A") == "Site A"
+    assert report.safe_filename("Site\u00a0A") == "Site A"
+    assert report.safe_filename("a/b", max_len=2) == "a-"
 
 
 def test_format_date_title():
@@ -88,6 +96,28 @@ def test_prepared_gallery_image_bytes_resizes_to_slot():
         assert image.size == (320, 180)
 
 
+def test_prepared_gallery_image_bytes_downscales_large_rotated_jpeg():
+    photo = Image.new("RGB", (2400, 1200), (0, 0, 255))
+    photo.paste((255, 0, 0), (0, 0, 1200, 1200))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # stored sideways; displayed rotated 90 degrees clockwise
+    buffer = BytesIO()
+    photo.save(buffer, format="JPEG", exif=exif.tobytes())
+
+    prepared = report._prepared_gallery_image_bytes(
+        buffer.getvalue(),
+        size=(100, 200),
+        missing_message="missing",
+        failure_message="failure",
+    )
+
+    with Image.open(BytesIO(prepared)) as image:
+        assert image.size == (100, 200)
+        top, bottom = image.getpixel((50, 20)), image.getpixel((50, 180))
+    assert top[0] > 200 and top[2] < 60
+    assert bottom[2] > 200 and bottom[0] < 60
+
+
 def test_prepared_gallery_image_bytes_falls_back_to_placeholder_for_invalid_data():
     prepared = report._prepared_gallery_image_bytes(
         b"not-a-real-image",
@@ -235,3 +265,175 @@ def test_generate_reports_uses_two_collage_pages_for_four_photos():
 
     assert len(document.inline_shapes) == 4
 
+
+
+def test_sanitized_template_bytes_are_reused_until_template_changes(tmp_path):
+    template = tmp_path / "template.docx"
+    with zipfile.ZipFile(template, "w") as zf:
+        zf.writestr("word/document.xml", "<w>{{ Reaction&amp;WayForword }}</w>")
+
+    first = report._sanitized_template_bytes(str(template))
+    second = report._sanitized_template_bytes(str(template))
+
+    assert first is second
+    with zipfile.ZipFile(BytesIO(first)) as zf:
+        assert zf.read("word/document.xml").decode("utf-8") == "<w>{{ Reaction_and_WayForword }}</w>"
+
+
+def test_generate_reports_stores_docx_entries_without_recompression():
+    data = report.generate_reports([_empty_row("Site A", "2025-08-06")], {}, "Civil", 70, 60, 2, 2, False)
+
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        assert [info.compress_type for info in zf.infolist()] == [zipfile.ZIP_STORED]
+
+
+def test_generate_reports_composes_shared_gallery_pages_once(monkeypatch):
+    calls = []
+    original = report._compose_gallery_page_bytes
+
+    def _counting_compose(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(report, "_compose_gallery_page_bytes", _counting_compose)
+    rows = [_empty_row("Site A", "2025-08-06"), _empty_row("Site A", "2025-08-06")]
+    uploaded = {("Site A", "2025-08-06"): [SQUARE_PNG]}
+
+    data = report.generate_reports(rows, uploaded, "Civil", 185, 120, 5, show_photo_placeholders=False)
+
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        assert len(zf.namelist()) == 2
+    assert len(calls) == 1
+
+
+def test_format_date_title_parses_day_first_dates_without_pandas(monkeypatch):
+    monkeypatch.setitem(__import__("sys").modules, "pandas", None)
+    report.format_date_title.cache_clear()
+    report.normalize_date.cache_clear()
+
+    assert report.format_date_title("6/8/2025") == "06.08.2025"
+    assert report.normalize_date("06-08-2025") == "2025-08-06"
+
+
+def test_generate_reports_patches_template_xml_once_per_part():
+    report._patched_template_xml.cache_clear()
+    rows = [_empty_row("Site A", "2025-08-06"), _empty_row("Site B", "2025-08-07")]
+
+    report.generate_reports(rows, {}, "Civil", 70, 60, 2, 2, False)
+    misses_after_first_export = report._patched_template_xml.cache_info().misses
+    report.generate_reports(rows, {}, "Civil", 70, 60, 2, 2, False)
+
+    info = report._patched_template_xml.cache_info()
+    assert misses_after_first_export >= 1
+    assert info.misses == misses_after_first_export
+    assert info.hits >= len(rows)
+
+
+def test_generate_reports_compiles_template_parts_once():
+    report._compiled_template_part.cache_clear()
+    rows = [_empty_row("Site A", "2025-08-06"), _empty_row("Site B", "2025-08-07")]
+
+    report.generate_reports(rows, {}, "Civil", 70, 60, 2, 2, False)
+    misses_after_first_export = report._compiled_template_part.cache_info().misses
+    zip_bytes = report.generate_reports(rows, {}, "Civil", 70, 60, 2, 2, False)
+
+    assert misses_after_first_export >= 1
+    assert report._compiled_template_part.cache_info().misses == misses_after_first_export
+    with zipfile.ZipFile(BytesIO(zip_bytes)) as zf:
+        bodies = [
+            zipfile.ZipFile(BytesIO(zf.read(name))).read("word/document.xml").decode("utf-8")
+            for name in zf.namelist()
+        ]
+    assert "Site A" in bodies[0] and "Site B" not in bodies[0]
+    assert "Site B" in bodies[1]
+
+
+def test_signatory_prerender_matches_single_pass_render(monkeypatch):
+    rows = [_empty_row("Site A", "2025-08-06")]
+    report._signatory_template_bytes.cache_clear()
+    prerendered = report.generate_reports(rows, {}, "Electrical", 70, 60, 2, 2, False)
+    monkeypatch.setattr(report, "_bare_template_placeholders", lambda template_bytes: None)
+    report._signatory_template_bytes.cache_clear()
+    single_pass = report.generate_reports(rows, {}, "Electrical", 70, 60, 2, 2, False)
+    report._signatory_template_bytes.cache_clear()
+
+    documents = []
+    for archive_bytes in (prerendered, single_pass):
+        with zipfile.ZipFile(BytesIO(archive_bytes)) as zf:
+            docx_bytes = zf.read(zf.namelist()[0])
+        body = zipfile.ZipFile(BytesIO(docx_bytes)).read("word/document.xml").decode("utf-8")
+        documents.append((body, len(Document(BytesIO(docx_bytes)).inline_shapes)))
+
+    (prerendered_body, prerendered_shapes), (single_body, single_shapes) = documents
+    assert "{{" not in prerendered_body
+    assert "Alexis IVUGIZA" in prerendered_body and "Site A" in prerendered_body
+    assert prerendered_shapes == single_shapes
+
+
+def test_bare_template_placeholders_rejects_statements():
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("word/document.xml", "<w:t>{% if Site_Name %}{{ Site_Name }}{% endif %}</w:t>")
+    assert report._bare_template_placeholders(buffer.getvalue()) is None
+
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("word/document.xml", "<w:t>{{ Site_</w:t><w:t>Name}}</w:t><w:t>{{Date}}</w:t>")
+    assert report._bare_template_placeholders(buffer.getvalue()) == {"Site_Name", "Date"}
+
+
+def test_generate_reports_process_pool_matches_thread_pool(monkeypatch):
+    rows = [_empty_row("Site A", "2025-08-06"), _empty_row("Site B", "2025-08-07"), _empty_row("Site A", "2025-08-06")]
+    uploaded = {("Site A", "2025-08-06"): [SQUARE_PNG], ("Site C", "2025-08-09"): [LANDSCAPE_PNG]}
+
+    threaded = report.generate_reports(rows, uploaded, "Civil", 70, 60, 2, 2, False)
+    monkeypatch.setattr(report, "REPORT_PROCESS_POOL_MIN_ROWS", 1)
+    processed = report.generate_reports(rows, uploaded, "Civil", 70, 60, 2, 2, False)
+
+    with zipfile.ZipFile(BytesIO(threaded)) as thread_zip, zipfile.ZipFile(BytesIO(processed)) as process_zip:
+        assert process_zip.namelist() == thread_zip.namelist()
+        for name in process_zip.namelist():
+            assert len(Document(BytesIO(process_zip.read(name))).inline_shapes) == len(
+                Document(BytesIO(thread_zip.read(name))).inline_shapes
+            )
+
+
+def test_mapping_for_rows_keeps_only_batch_keys():
+    mapping = {("Site A", "2025-08-06"): [SQUARE_PNG], ("Site B", "2025-08-07"): [SQUARE_PNG]}
+
+    subset = report._mapping_for_rows(mapping, [_empty_row(" Site A ", "2025-08-06")])
+
+    assert subset == {("Site A", "2025-08-06"): [SQUARE_PNG]}
+    assert report._mapping_for_rows(None, [_empty_row("Site A", "2025-08-06")]) == {}
+
+
+def test_asset_image_stream_reads_each_asset_once(tmp_path):
+    asset = tmp_path / "signature.png"
+    asset.write_bytes(SQUARE_PNG)
+    report._asset_bytes_for.cache_clear()
+
+    first = report._asset_image_stream(str(asset))
+    second = report._asset_image_stream(str(asset))
+
+    assert first.read() == second.read() == SQUARE_PNG
+    assert report._asset_bytes_for.cache_info().misses == 1
+
+
+def test_resolve_asset_memoises_lookups():
+    report.resolve_asset.cache_clear()
+
+    first = report.resolve_asset("issac_habimana")
+    second = report.resolve_asset("issac_habimana")
+
+    assert first == second
+    assert first.endswith("issac_habimana.jpg")
+    assert report.resolve_asset.cache_info().hits == 1
+
+
+def test_date_formatting_is_memoised_per_value():
+    report.format_date_title.cache_clear()
+
+    for _ in range(3):
+        assert report.format_date_title("06/08/2025") == "06.08.2025"
+
+    assert report.format_date_title.cache_info().misses == 1
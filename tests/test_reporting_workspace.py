@@ -157,6 +157,61 @@ def test_render_reporting_workspace_uses_empty_filter_defaults_and_preserves_all
     assert len(st_stub.dataframe_capture) == 2
 
 
+def test_render_reporting_workspace_date_options_skip_rows_without_a_site(monkeypatch):
+    st_stub = _StreamlitStub()
+    st_stub.button_states["Generate Reports"] = False
+
+    monkeypatch.setattr(reporting_workspace, "st", st_stub)
+    _patch_layout(monkeypatch)
+
+    reporting_workspace.render_reporting_workspace(
+        record_runtime_issue=lambda *_, **__: None,
+        active_guidance_text=lambda *_args: "",
+        get_sheet_data_fn=lambda: [
+            ["header"],
+            ["01/08/2025", "Site A"] + [""] * 12,
+            ["02/08/2025", "Site B"] + [""] * 12,
+            ["03/08/2025", ""] + [""] * 12,
+            [""] * 14,
+        ],
+        get_unique_sites_and_dates_fn=lambda rows: (["Site A", "Site B"], ["01/08/2025", "02/08/2025", "03/08/2025"]),
+        load_offline_cache_fn=lambda: {},
+        append_rows_to_sheet_fn=lambda *_args, **_kwargs: None,
+        generate_reports_fn=lambda *_args, **_kwargs: b"zip-bytes",
+    )
+
+    dates_call = next(call for call in st_stub.multiselect_calls if call["label"] == "Dates")
+
+    assert dates_call["options"] == ["01/08/2025", "02/08/2025"]
+    assert len(st_stub.dataframe_capture) == 2
+
+
+def test_render_reporting_workspace_caps_read_only_preview_but_keeps_all_rows(monkeypatch):
+    st_stub = _StreamlitStub()
+    st_stub.button_states["Generate Reports"] = False
+
+    monkeypatch.setattr(reporting_workspace, "st", st_stub)
+    monkeypatch.setattr(reporting_workspace, "REVIEW_PREVIEW_MAX_ROWS", 1)
+    _patch_layout(monkeypatch)
+
+    reporting_workspace.render_reporting_workspace(
+        record_runtime_issue=lambda *_, **__: None,
+        active_guidance_text=lambda *_args: "",
+        get_sheet_data_fn=lambda: [
+            ["header"],
+            ["2026-04-18", "Site A"] + [""] * 12,
+            ["2026-04-19", "Site B"] + [""] * 12,
+        ],
+        get_unique_sites_and_dates_fn=lambda rows: (["Site A", "Site B"], ["2026-04-18", "2026-04-19"]),
+        load_offline_cache_fn=lambda: {},
+        append_rows_to_sheet_fn=lambda *_args, **_kwargs: None,
+        generate_reports_fn=lambda *_args, **_kwargs: b"zip-bytes",
+    )
+
+    assert len(st_stub.dataframe_capture) == 1
+    assert len(st_stub.session_state["structured_report_data"]) == 2
+
+
 def test_render_reporting_workspace_caption_failure_uses_fallback_and_generates_zip(monkeypatch):
     st_stub = _StreamlitStub()
     recorded_issues = []
@@ -208,3 +263,116 @@ def test_append_new_uploaded_images_does_not_duplicate_same_uploader_payload(mon
     assert first == [b"image-bytes"]
     assert second == [b"image-bytes"]
     assert appended == [b"image-bytes", b"pasted-image"]
+
+
+def test_scope_frame_matches_stripped_site_and_date_keys():
+    frame = reporting_workspace.sheet_rows_frame(
+        [
+            [" 2026-04-18 ", "Site A "],
+            ["2026-04-19", "Site A"] + [""] * 12,
+            ["2026-04-18", "Site B"] + [""] * 12,
+        ]
+    )
+
+    scoped = reporting_workspace.scope_frame(frame, ["Site A"], ["2026-04-18"])
+
+    assert list(frame.columns[: len(reporting_workspace.REPORT_HEADERS)]) == reporting_workspace.REPORT_HEADERS
+    assert scoped[["_site", "_date"]].values.tolist() == [["Site A", "2026-04-18"]]
+    assert scoped["Site_Name"].tolist() == ["Site A "]
+
+
+def test_site_dates_index_unions_dates_for_selected_sites():
+    frame = reporting_workspace.sheet_rows_frame(
+        [
+            ["2026-04-19", "Site A"],
+            [" 2026-04-18 ", "Site A "],
+            ["2026-04-18", "Site B"],
+            ["2026-04-20", "Site C"],
+            ["2026-04-19", "Site A"],
+        ]
+    )
+
+    index = reporting_workspace.site_dates_index(frame)
+
+    assert index["Site A"] == ("2026-04-18", "2026-04-19")
+    assert reporting_workspace.dates_for_sites(index, ["Site A", "Site B"]) == ["2026-04-18", "2026-04-19"]
+    assert reporting_workspace.dates_for_sites(index, ["Missing"]) == []
+
+
+def test_append_new_uploaded_images_reads_each_upload_once(monkeypatch):
+    class _CountingUpload(_UploadedImageStub):
+        reads = 0
+
+        def getvalue(self):
+            _CountingUpload.reads += 1
+            return self._data
+
+    st_stub = types.SimpleNamespace(session_state={})
+    monkeypatch.setattr(reporting_workspace, "st", st_stub)
+    payload = b"image-bytes"
+    files = [_CountingUpload("a.jpg", payload)]
+
+    group = reporting_workspace.append_new_uploaded_images(("Site A", "2026-04-18"), files, upload_key="uploader")
+
+    assert _CountingUpload.reads == 1
+    assert group[0] is payload
+
+
+def test_review_scope_default_scope_skips_blank_sheet_rows(monkeypatch):
+    monkeypatch.setattr(reporting_workspace, "st", types.SimpleNamespace(session_state={}))
+    frame = reporting_workspace.sheet_rows_frame(
+        [["01/08/2025", "Site A"], [], ["02/08/2025", ""], ["02/08/2025", "Site B"]]
+    )
+
+    scope = reporting_workspace.review_scope(
+        frame, [], [], ["Site A", "Site B"], ["01/08/2025", "02/08/2025"]
+    )
+
+    assert len(scope["rows"]) == 2
+    assert scope["site_date_pairs"] == [("Site A", "01/08/2025"), ("Site B", "02/08/2025")]
+
+
+def test_review_scope_is_reused_until_filters_or_frame_change(monkeypatch):
+    monkeypatch.setattr(reporting_workspace, "st", types.SimpleNamespace(session_state={}))
+    frame = reporting_workspace.sheet_rows_frame(
+        [["2026-04-18", "Site A"], ["2026-04-19", "Site B"], ["2026-04-18", "Site A"]]
+    )
+    dates = ["2026-04-18", "2026-04-19"]
+
+    first = reporting_workspace.review_scope(frame, [], [], ["Site A", "Site B"], dates)
+    again = reporting_workspace.review_scope(frame, [], [], ["Site A", "Site B"], dates)
+    scoped = reporting_workspace.review_scope(frame, ["Site A"], [], ["Site A"], ["2026-04-18"])
+
+    assert again is first
+    assert len(first["preview"]) == 3
+    assert scoped is not first
+    assert scoped["site_date_pairs"] == [("Site A", "2026-04-18")]
+    assert scoped["site_count"] == 1
+    assert len(scoped["rows"]) == 2
+
+
+def test_safe_fragment_wraps_function_when_streamlit_supports_fragments(monkeypatch):
+    wrapped = []
+
+    def fragment(fn):
+        wrapped.append(fn)
+        return lambda: ("fragment", fn())
+
+    monkeypatch.setattr(helpers, "st", types.SimpleNamespace(fragment=fragment))
+
+    def section():
+        return "rendered"
+
+    result = helpers.safe_fragment(section)
+
+    assert wrapped == [section]
+    assert result() == ("fragment", "rendered")
+
+
+def test_safe_fragment_returns_function_unchanged_without_fragment_support(monkeypatch):
+    monkeypatch.setattr(helpers, "st", types.SimpleNamespace())
+
+    def section():
+        return "rendered"
+
+    assert helpers.safe_fragment(section) is section
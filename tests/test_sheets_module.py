@@ -1,3 +1,4 @@
+from contextlib import nullcontext
 from pathlib import Path
 
 import pytest
@@ -31,14 +32,51 @@ def test_get_unique_sites_and_dates():
     assert dates == ["2024-01-01", "2024-01-02"]
 
 
-def test_save_and_load_offline_cache(tmp_path, monkeypatch):
+def test_get_unique_sites_and_dates_sorts_values():
+    rows = [
+        ["10/01/2025", "Site B"],
+        ["02/02/2025", "Site A"],
+        ["10/01/2025", "Site B"],
+    ]
+    sites, dates = sheets.get_unique_sites_and_dates(rows)
+    assert sites == ["Site A", "Site B"]
+    assert dates == ["02/02/2025", "10/01/2025"]
+
+
+def test_get_unique_sites_and_dates_strips_and_skips_blank_cells():
+    rows = [[" 2024-01-01 ", " Site A "], ["2024-01-02", "  "], ["", "Site A"], ["2024-01-03"]]
+    sites, dates = sheets.get_unique_sites_and_dates(rows)
+    assert sites == ["Site A"]
+    assert dates == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert sheets.get_unique_sites_and_dates([]) == ([], [])
+
+
+def test_get_unique_sites_and_dates_recomputes_when_rows_change():
+    rows = [["2024-01-01", "Site A"]]
+    assert sheets.get_unique_sites_and_dates([list(row) for row in rows]) == (["Site A"], ["2024-01-01"])
+
+    rows[0][1] = "Site B"
+    assert sheets.get_unique_sites_and_dates(rows) == (["Site B"], ["2024-01-01"])
+    assert sheets.sheet_rows_fingerprint(rows) == sheets.sheet_rows_fingerprint([list(row) for row in rows])
+
+
+def test_load_and_clear_offline_cache(tmp_path, monkeypatch):
     monkeypatch.setattr(sheets, "CACHE_FILE", tmp_path / "cache.json")
     rows = [["2024-01-01", "Site A"]]
-    uploads = {("Site A", "2024-01-01"): []}
-    sheets.save_offline_cache(rows, uploads)
+    uploads_dir = tmp_path / "cache_uploads" / "0"
+    uploads_dir.mkdir(parents=True)
+    (uploads_dir / "0").write_bytes(b"photo")
+    sheets._write_offline_cache({"rows": rows, "uploads": {"Site A|2024-01-01": []}})
+
     data = sheets.load_offline_cache()
+
     assert data["rows"] == rows
     assert data["uploads"] == {"Site A|2024-01-01": []}
+    assert [path.name for path in tmp_path.iterdir() if path.is_file()] == ["cache.json"]
+
+    sheets.clear_offline_cache()
+    assert sheets.load_offline_cache() is None
+    assert not (tmp_path / "cache_uploads").exists()
 
 
 def test_permission_error_includes_service_account_and_sheet_context(monkeypatch):
@@ -68,3 +106,327 @@ def test_non_permission_google_api_error_is_not_rewritten():
         sheets._raise_actionable_sheet_error("reading rows", original)
 
     assert exc_info.value is original
+
+
+class _FakeRequest:
+    def __init__(self, payload, calls=None, errors=None):
+        self._payload = payload
+        self._calls = calls
+        self._errors = errors
+
+    def execute(self, num_retries=0):
+        if self._calls is not None:
+            self._calls.append(num_retries)
+        if self._errors:
+            raise self._errors.pop(0)
+        return self._payload
+
+
+class _FakeValues:
+    def __init__(self, service):
+        self._service = service
+
+    def batchGet(self, **kwargs):
+        self._service.value_calls.append(kwargs)
+        start_cell = kwargs["ranges"][0].split("!", 1)[1].split(":", 1)[0]
+        start_row = int(start_cell.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ") or 1)
+        return _FakeRequest({"valueRanges": [{"values": self._service.values[start_row - 1 :]}]})
+
+    def append(self, **kwargs):
+        self._service.append_calls.append(kwargs)
+        return _FakeRequest({}, self._service.execute_retries, self._service.append_errors)
+
+
+class _FakeSpreadsheets:
+    def __init__(self, service):
+        self._service = service
+
+    def values(self):
+        return _FakeValues(self._service)
+
+
+class _FakeSheetsService:
+    def __init__(self, values):
+        self.values = values
+        self.value_calls = []
+        self.append_calls = []
+        self.execute_retries = []
+        self.append_errors = []
+
+    def spreadsheets(self):
+        return _FakeSpreadsheets(self)
+
+
+def test_get_sheet_data_without_drive_probe_relies_on_values_ttl(monkeypatch, tmp_path):
+    service = _FakeSheetsService([["Date", "Site_Name"], ["2024-01-01", "Site A"]])
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SHEET_NAME", "Reports")
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+    monkeypatch.setattr(sheets, "_sheet_modified_time", lambda: "")
+    sheets.clear_sheet_data_cache()
+
+    first = sheets.get_sheet_data()
+    sheets.get_sheet_rows_refresher().reset()
+    second = sheets.get_sheet_data()
+
+    assert first == second
+    assert first[1][:2] == ["2024-01-01", "Site A"]
+    assert len(first[1]) == 14
+    assert sheets._sheet_revision_token() == ""
+    assert len(service.value_calls) == 1
+    assert service.value_calls[0]["ranges"] == ["Reports!A1:N"]
+    assert service.value_calls[0]["fields"] == "valueRanges(values)"
+    assert not (tmp_path / "snapshot.json").exists()
+    sheets.clear_sheet_data_cache()
+
+
+def test_sheet_data_served_from_background_refresher(monkeypatch, tmp_path):
+    service = _FakeSheetsService([["Date", "Site_Name"], ["2024-01-01", "Site A"]])
+    revision = {"modified": "2024-01-01T00:00:00.000Z"}
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SHEET_NAME", "Reports")
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+    monkeypatch.setattr(sheets, "_sheet_modified_time", lambda: revision["modified"])
+    sheets.clear_sheet_data_cache()
+    refresher = sheets.get_sheet_rows_refresher()
+
+    sheets.get_sheet_data()
+
+    def _no_script_cache(*_args):
+        raise AssertionError("the refresher thread must not call st.cache_data functions")
+
+    monkeypatch.setattr(sheets, "_sheet_revision_token", _no_script_cache)
+    monkeypatch.setattr(sheets, "_fetch_sheet_rows", _no_script_cache)
+    service.values = service.values + [["2024-01-02", "Site B"]]
+    refresher.refresh()
+
+    assert len(service.value_calls) == 1
+
+    revision["modified"] = "2024-01-02T00:00:00.000Z"
+    refresher.refresh()
+    rows = sheets.get_sheet_data()
+
+    assert [row[1] for row in rows] == ["Site_Name", "Site A", "Site B"]
+    assert len(service.value_calls) == 2
+    monkeypatch.undo()
+    sheets.clear_sheet_data_cache()
+
+
+def test_sheet_rows_refresher_stops_and_drops_rows_when_idle(monkeypatch):
+    refresher = sheets.SheetRowsRefresher(interval_seconds=0, idle_seconds=0)
+    refreshed = []
+    monkeypatch.setattr(refresher, "refresh", lambda: refreshed.append(True))
+    refresher.store([["Date", "Site_Name"]])
+
+    refresher._run()
+
+    assert refreshed == []
+    assert refresher.latest() is None
+
+
+def test_sheet_rows_reread_whole_range_when_revision_changes(monkeypatch, tmp_path):
+    service = _FakeSheetsService(
+        [["Date", "Site_Name"], ["01/08/2025", "Site A"], ["02/08/2025", "Site B"]]
+    )
+    revision = {"modified": "2025-08-02T10:00:00.000Z"}
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SHEET_NAME", "Reports")
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+    monkeypatch.setattr(sheets, "_sheet_modified_time", lambda: revision["modified"])
+    sheets.clear_sheet_data_cache()
+
+    sheets.get_sheet_data()
+    service.values = [
+        ["Date", "Site_Name"],
+        ["01/08/2025", "Site A2"],
+        ["01/08/2025", "Site Z"],
+        ["02/08/2025", "Site B"],
+    ]
+    revision["modified"] = "2025-08-02T11:00:00.000Z"
+    sheets.clear_sheet_data_cache()
+    rows = sheets.get_sheet_data()
+
+    assert [row[1] for row in rows] == ["Site_Name", "Site A2", "Site Z", "Site B"]
+    assert [call["ranges"] for call in service.value_calls] == [["Reports!A1:N"], ["Reports!A1:N"]]
+    sheets.clear_sheet_data_cache()
+
+
+def test_sheet_snapshot_skips_read_only_for_the_same_revision(monkeypatch, tmp_path):
+    service = _FakeSheetsService([["Date", "Site_Name"], ["2024-01-01", "Site A"]])
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+
+    first = sheets._fetch_sheet_rows.__wrapped__("Reports@1")
+    restarted = sheets._fetch_sheet_rows.__wrapped__("Reports@1")
+    changed = sheets._fetch_sheet_rows.__wrapped__("Reports@2")
+    sheets._fetch_sheet_rows.__wrapped__("")
+
+    assert first == restarted == changed
+    assert all(len(row) == 14 for row in first)
+    assert len(service.value_calls) == 3
+    assert [path.name for path in tmp_path.iterdir()] == ["snapshot.json"]
+
+
+def test_append_rows_to_sheet_retries_rate_limits_and_clears_cache(monkeypatch, tmp_path):
+    service = _FakeSheetsService([["Date", "Site_Name"]])
+    service.append_errors = [_http_error(429)]
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SHEET_NAME", "Reports")
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+    monkeypatch.setattr(sheets.time, "sleep", lambda seconds: None)
+    refresher = sheets.get_sheet_rows_refresher()
+    refresher.store([["stale"]])
+    (tmp_path / "snapshot.json").write_text("{}")
+
+    sheets.append_rows_to_sheet([["2024-01-03", "Site C"]])
+
+    assert service.append_calls[0]["body"] == {"values": [["2024-01-03", "Site C"]]}
+    assert service.execute_retries == [0, 0]
+    assert refresher.latest() is None
+    assert not (tmp_path / "snapshot.json").exists()
+
+
+def test_append_rows_to_sheet_does_not_resend_after_server_error(monkeypatch, tmp_path):
+    service = _FakeSheetsService([["Date", "Site_Name"]])
+    service.append_errors = [_http_error(503)]
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+
+    with pytest.raises(HttpError):
+        sheets.append_rows_to_sheet([["2024-01-03", "Site C"]])
+
+    assert service.execute_retries == [0]
+
+
+def test_append_rows_to_sheet_sends_rows_in_batches(monkeypatch, tmp_path):
+    service = _FakeSheetsService([["Date", "Site_Name"]])
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+    monkeypatch.setattr(sheets, "SHEET_APPEND_BATCH_ROWS", 2)
+    rows = [[f"2024-01-0{day}", "Site C"] for day in range(1, 6)]
+
+    sheets.append_rows_to_sheet(rows)
+
+    assert [call["body"]["values"] for call in service.append_calls] == [rows[0:2], rows[2:4], rows[4:5]]
+
+
+def test_append_rows_to_sheet_reports_rows_landed_before_a_failed_batch(monkeypatch, tmp_path):
+    service = _FakeSheetsService([["Date", "Site_Name"]])
+    monkeypatch.setattr(sheets, "_build_service", lambda: nullcontext(service))
+    monkeypatch.setattr(sheets, "SNAPSHOT_FILE", tmp_path / "snapshot.json")
+    monkeypatch.setattr(sheets, "SHEET_APPEND_BATCH_ROWS", 2)
+    rows = [[f"2024-01-0{day}", "Site C"] for day in range(1, 6)]
+    real_append = _FakeValues.append
+
+    def append(self, **kwargs):
+        if len(self._service.append_calls) == 2:
+            self._service.append_errors.append(_http_error(500))
+        return real_append(self, **kwargs)
+
+    monkeypatch.setattr(_FakeValues, "append", append)
+
+    with pytest.raises(sheets.PartialSheetAppendError) as exc_info:
+        sheets.append_rows_to_sheet(rows)
+
+    assert exc_info.value.appended_rows == 4
+    assert exc_info.value.total_rows == 5
+
+
+def test_drop_synced_offline_rows_keeps_unsent_rows_and_uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(sheets, "CACHE_FILE", tmp_path / "cache.json")
+    rows = [["2024-01-01", "Site A"], ["2024-01-02", "Site B"], ["2024-01-03", "Site C"]]
+    sheets._write_offline_cache({"rows": rows, "uploads": {}})
+
+    sheets.drop_synced_offline_rows(2)
+
+    assert sheets.load_offline_cache() == {"rows": rows[2:], "uploads": {}}
+
+
+class _FakeDriveFiles:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, **kwargs):
+        self._service.calls.append(kwargs)
+        if self._service.error is not None:
+            raise self._service.error
+        return _FakeRequest({"modifiedTime": self._service.modified_time})
+
+
+class _FakeDriveService:
+    def __init__(self, modified_time="2024-01-01T00:00:00.000Z", error=None):
+        self.modified_time = modified_time
+        self.error = error
+        self.calls = []
+
+    def files(self):
+        return _FakeDriveFiles(self)
+
+
+def test_revision_token_prefers_drive_modified_time(monkeypatch):
+    drive = _FakeDriveService()
+    monkeypatch.setattr(sheets, "_build_drive_service", lambda: nullcontext(drive))
+    monkeypatch.setattr(sheets, "_drive_probe_available", True)
+    monkeypatch.setattr(sheets, "SHEET_NAME", "Reports")
+    sheets._sheet_revision_token.clear()
+
+    assert sheets._sheet_revision_token() == "Reports@2024-01-01T00:00:00.000Z"
+    assert drive.calls[0]["fields"] == "modifiedTime"
+    sheets._sheet_revision_token.clear()
+
+
+def test_drive_probe_switches_off_after_permission_error(monkeypatch):
+    drive = _FakeDriveService(error=_http_error(403))
+    monkeypatch.setattr(sheets, "_build_drive_service", lambda: nullcontext(drive))
+    monkeypatch.setattr(sheets, "_drive_probe_available", True)
+
+    assert sheets._sheet_modified_time() == ""
+    assert sheets._sheet_modified_time() == ""
+    assert len(drive.calls) == 1
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_offline_cache_round_trips_with_and_without_orjson(tmp_path, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(sheets, "orjson", None)
+    monkeypatch.setattr(sheets, "CACHE_FILE", tmp_path / "cache.json")
+    rows = [["2024-01-01", "Site é"]]
+
+    sheets._write_offline_cache({"rows": rows, "uploads": {}})
+
+    assert sheets.load_offline_cache() == {"rows": rows, "uploads": {}}
+
+
+def test_pooled_service_reuses_idle_clients_across_threads(monkeypatch):
+    import threading
+
+    import googleapiclient.discovery
+
+    built = []
+    creds = object()
+    monkeypatch.setattr(sheets, "_shared_service_account_credentials", lambda: creds)
+    monkeypatch.setattr(sheets, "_idle_services", {})
+    monkeypatch.setattr(
+        googleapiclient.discovery,
+        "build",
+        lambda api, version, credentials, cache_discovery: built.append((api, credentials)) or object(),
+    )
+
+    with sheets._build_service() as first:
+        with sheets._build_service() as concurrent:
+            assert concurrent is not first
+    with sheets._build_drive_service() as drive:
+        assert drive is not first
+
+    other = []
+
+    def _use_service():
+        with sheets._build_service() as service:
+            other.append(service)
+
+    worker = threading.Thread(target=_use_service)
+    worker.start()
+    worker.join()
+
+    assert other[0] in (first, concurrent)
+    assert built == [("sheets", creds), ("sheets", creds), ("drive", creds)]
@@ -0,0 +1,26 @@
+from streamlit_ui import theme
+
+
+def test_minify_css_keeps_selectors_and_drops_layout_whitespace():
+    css = """
+    <style>
+    /* comment */
+    .a > .b,
+    .c :hover {
+        color: red;
+        padding: calc(1rem - 2px);
+    }
+    </style>
+    """
+
+    assert theme._minify_css(css) == "<style>.a>.b,.c :hover{color:red;padding:calc(1rem - 2px);}</style>"
+
+
+def test_apply_professional_theme_sends_prebuilt_stylesheet(monkeypatch):
+    calls = []
+    monkeypatch.setattr(theme, "safe_markdown", lambda body, **kwargs: calls.append((body, kwargs)))
+
+    theme.apply_professional_theme()
+
+    assert calls == [(theme.PROFESSIONAL_THEME_STYLE, {"unsafe_allow_html": True})]
+    assert theme.PROFESSIONAL_THEME_STYLE.startswith("<style>:root{")
@@ -1,6 +1,8 @@
 from datetime import datetime
+from functools import lru_cache
 
 
+@lru_cache(maxsize=4096)
 def parse_any_date(datestr: str):
     """Parse a date string in multiple formats into a ``datetime.date``.
 